@@ -1,10 +1,17 @@
-from ultralytics import YOLO
-from deep_sort_realtime.deepsort_tracker import DeepSort
+import os
+import sys
 import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'track'))
+from detection_filter import extract_detections
+from inference_backend import load_detector
+from trackers import create_tracker
 
 
 class YOLOv8DeepSORTTracker:
-    def __init__(self, model_path, rtsp_url, max_age=30):
+    def __init__(self, model_path, rtsp_url, max_age=30, device='auto', backend='auto',
+                 tracker='deepsort'):
         """
         初始化 YOLOv8 + DeepSORT 跟踪器。
 
@@ -12,13 +19,15 @@ class YOLOv8DeepSORTTracker:
             model_path (str): YOLOv8 模型路径。
             rtsp_url (str): RTSP 视频流地址。
             max_age (int): DeepSORT 跟踪器的 max_age 参数。
+            device (str): 推理设备，'auto' 时有 GPU 用 CUDA，否则用 CPU。
+            backend (str): 推理后端，'auto'、'torch'、'onnx' 或 'openvino'。
+            tracker (str): 'deepsort'（外观 + 运动）或 'bytetrack'（仅运动，开销小）。
         """
-        # 加载 YOLOv8 模型
-        self.model = YOLO(model_path)
-        self.model.to('cuda')  # 使用 GPU 加速
+        # 加载 YOLOv8 模型：有 GPU 时用 CUDA 加速，否则用导出的 CPU 推理模型
+        self.model = load_detector(model_path, device=device, backend=backend)
 
-        # 初始化 DeepSORT 跟踪器
-        self.tracker = DeepSort(max_age=max_age)
+        # 初始化跟踪器
+        self.tracker = create_tracker(tracker, max_age=max_age)
 
         # 打开 RTSP 视频流
         self.cap = cv2.VideoCapture(rtsp_url)
@@ -69,26 +78,12 @@ class YOLOv8DeepSORTTracker:
         # 使用 YOLOv8 进行目标检测
         results = self.model(frame, verbose=False)  # verbose=False 关闭冗余输出
 
-        # 提取检测结果
-        detections = []
-        for result in results:
-            boxes = result.boxes.xyxy.cpu().numpy()  # 检测框坐标 (x1, y1, x2, y2)
-            confidences = result.boxes.conf.cpu().numpy()  # 置信度
-            class_ids = result.boxes.cls.cpu().numpy()  # 类别 ID
-
-            for box, confidence, class_id in zip(boxes, confidences, class_ids):
-                detections.append((box, confidence, class_id))
-
-        # 将检测结果转换为 DeepSORT 所需的格式
-        deepsort_detections = []
-        for box, confidence, class_id in detections:
-            x1, y1, x2, y2 = box
-            width = x2 - x1
-            height = y2 - y1
-            deepsort_detections.append(([x1, y1, width, height], confidence, class_id))
-
-        # 使用 DeepSORT 进行目标追踪
-        self.tracks = self.tracker.update_tracks(deepsort_detections, frame=frame)
+        # 提取检测结果：整批拷回主机后向量化过滤，得到 [l, t, w, h, conf, cls]
+        detections = np.concatenate([extract_detections(result.boxes.data) for result in results])
+
+        # 目标追踪
+        self.tracker.select(self.selected_track_id)
+        self.tracks = self.tracker.update(detections, frame)
 
         # 绘制追踪结果
         for track in self.tracks:
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'track'))
+from camera_model import CameraModel
+from control_loop import ControlLoop
+
+FRAME_SIZE = (1920, 1080)
+TARGET = (1500, 300)  # 光轴右上方的目标
+
+
+class _Writer:
+    interval = 0.05
+
+    def __init__(self):
+        self.angles = []
+
+    def set_angle(self, yaw, pitch):
+        self.angles.append((yaw, pitch))
+
+
+class _Transport:
+    rtt = None
+
+
+class _Telemetry:
+    latest = None
+
+
+def test_offset_shrinks_with_zoom():
+    model = CameraModel()
+    yaw_1x, pitch_1x = model.pixel_to_angle(*TARGET, FRAME_SIZE)
+    model.set_zoom(4.0)
+    yaw_4x, pitch_4x = model.pixel_to_angle(*TARGET, FRAME_SIZE)
+    assert yaw_1x > 0 and pitch_1x < 0
+    assert 0 < yaw_4x < yaw_1x / 3
+    assert pitch_1x / 3 < pitch_4x < 0
+
+
+def _angle_command(zoom=1.0, set_zoom=None):
+    writer = _Writer()
+    loop = ControlLoop(writer, _Transport(), _Telemetry(), track_mode='angle', zoom=zoom)
+    if set_zoom is not None:
+        loop.set_zoom(set_zoom)
+    loop.observe(TARGET, time.monotonic(), FRAME_SIZE)
+    loop.start_tracking()
+    loop._step(time.monotonic())
+    return writer.angles[-1]
+
+
+def test_control_loop_uses_zoom():
+    yaw_1x, pitch_1x = _angle_command()
+    yaw_4x, pitch_4x = _angle_command(zoom=4.0)
+    assert 0 < yaw_4x < yaw_1x / 3
+    assert pitch_1x / 3 < pitch_4x < 0
+    assert _angle_command(set_zoom=4.0) == (yaw_4x, pitch_4x)
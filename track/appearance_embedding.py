@@ -0,0 +1,188 @@
+import cv2
+import numpy as np
+from box_ops import box_iou
+
+# 与 deep_sort_realtime 的 MobileNetv2_Embedder 前处理一致
+INPUT_SIZE = 224
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+# ============================== 批量特征提取 ==============================
+class CropEmbedder:
+    def __init__(self, model, device='cpu', half=False, bgr=True, input_size=INPUT_SIZE, max_batch=16):
+        """
+        一帧的全部检测框裁剪后一次前向推理得到外观特征。
+
+        裁剪图直接缩放进预分配的 uint8 批缓冲区（不够时按需扩大），
+        转为张量后在推理设备上统一做通道转换与归一化，不再逐张预处理。
+
+        Args:
+            model: 外观特征网络（torch.nn.Module），如 DeepSort 自带的 MobileNetV2。
+            device (str): 推理设备。
+            half (bool): 是否用半精度推理（仅 GPU）。
+            bgr (bool): 输入画面是否为 BGR。
+            input_size (int): 网络输入边长。
+            max_batch (int): 初始批缓冲区大小。
+        """
+        import torch
+        self.torch = torch
+        self.model = model.to(device).eval()
+        self.device = device
+        self.half = half
+        self.bgr = bgr
+        self.input_size = input_size
+        self._buffer = np.empty((max_batch, input_size, input_size, 3), dtype=np.uint8)
+        self._mean = torch.tensor(IMAGENET_MEAN, device=device).view(1, 3, 1, 1) * 255.0
+        self._std = torch.tensor(IMAGENET_STD, device=device).view(1, 3, 1, 1) * 255.0
+        self.calls = 0
+        self.embedded = 0
+
+    @classmethod
+    def mobilenet(cls, device=None):
+        """使用 deep_sort_realtime 自带的 MobileNetV2 权重"""
+        import torch
+        from deep_sort_realtime.embedder.embedder_pytorch import MobileNetv2_Embedder
+        gpu = torch.cuda.is_available() if device is None else device.startswith('cuda')
+        embedder = MobileNetv2_Embedder(half=gpu, max_batch_size=16, bgr=True, gpu=gpu)
+        return cls(embedder.model, 'cuda' if gpu else 'cpu', half=gpu)
+
+    def __call__(self, frame, boxes):
+        """
+        Args:
+            frame (ndarray): 原始画面。
+            boxes (ndarray): (N, 4) 的 [x1, y1, x2, y2]。
+
+        Returns:
+            ndarray: (N, D) 的 float32 特征。
+        """
+        n = len(boxes)
+        if n == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        if n > len(self._buffer):
+            self._buffer = np.empty((n,) + self._buffer.shape[1:], dtype=np.uint8)
+        height, width = frame.shape[:2]
+        size = (self.input_size, self.input_size)
+        for i, (x1, y1, x2, y2) in enumerate(np.asarray(boxes).astype(int)):
+            x1, y1 = min(max(x1, 0), width - 1), min(max(y1, 0), height - 1)
+            x2, y2 = min(max(x2, x1 + 1), width), min(max(y2, y1 + 1), height)
+            cv2.resize(frame[y1:y2, x1:x2], size, dst=self._buffer[i])
+
+        torch = self.torch
+        with torch.inference_mode():
+            batch = torch.from_numpy(self._buffer[:n]).to(self.device, non_blocking=True)
+            batch = batch.permute(0, 3, 1, 2)
+            if self.bgr:
+                batch = batch.flip(1)
+            batch = (batch.float() - self._mean) / self._std
+            if self.half:
+                batch = batch.half()
+            features = self.model(batch).float().cpu().numpy()
+        self.calls += 1
+        self.embedded += n
+        return features
+
+
+# ============================== 按需提取 ==============================
+class SelectiveEmbedding:
+    def __init__(self, embedder, overlap_iou=0.1, motion_iou=0.5, cache_frames=5, cache_iou=0.7):
+        """
+        只为可能影响选中目标、或运动上有歧义的检测提取外观特征。
+
+        先用卡尔曼预测框与检测框的 IoU 判断每个检测的归属：只与一条轨迹重叠、
+        IoU 不低于 motion_iou、且该轨迹也只与它重叠的检测视为无歧义，直接沿用
+        该轨迹上次的特征（等同于只按运动匹配）。其余检测——与多条轨迹重叠、
+        没有对应轨迹的新目标、以及与选中目标重叠的检测——才送入 embedder，
+        一帧只调用一次。选中目标丢失期间所有检测都提取特征，以便重新找回。
+
+        选中目标的检测框与上次提取特征时相比变化不大（IoU ≥ cache_iou）
+        且不超过 cache_frames 帧时，也直接复用缓存的特征。
+
+        Args:
+            embedder (CropEmbedder): 批量特征提取器。
+            overlap_iou (float): 视为可能属于某条轨迹的最低 IoU。
+            motion_iou (float): 只按运动匹配所需的最低 IoU。
+            cache_frames (int): 选中目标特征缓存的最长帧数。
+            cache_iou (float): 复用缓存所需的最低 IoU（与缓存时的框相比）。
+        """
+        self.embedder = embedder
+        self.overlap_iou = overlap_iou
+        self.motion_iou = motion_iou
+        self.cache_frames = cache_frames
+        self.cache_iou = cache_iou
+        self.frame = 0
+        self.cache = {}  # track_id → (特征, 提取时的框, 提取时的帧号)
+        self._sources = []
+        self.reused = 0
+
+    def tick(self):
+        self.frame += 1
+
+    def reset(self):
+        self.cache.clear()
+
+    def features(self, frame, boxes, track_ids, predicted, lost, selected_id):
+        """
+        返回每个检测的特征。
+
+        Args:
+            frame (ndarray): 原始画面。
+            boxes (ndarray): (N, 4) 检测框 [x1, y1, x2, y2]。
+            track_ids (list): 现有轨迹的 track_id。
+            predicted (ndarray): (T, 4) 轨迹在本帧的预测框。
+            lost (list): 每条轨迹是否已有未匹配的帧。
+            selected_id: 选中目标的 track_id，未选中为 None。
+        """
+        self.tick()
+        n = len(boxes)
+        sources = [None] * n  # None 表示需要提取，否则为沿用其特征的 track_id
+        features = [None] * n
+        selected = track_ids.index(selected_id) if selected_id in track_ids else None
+        search_all = selected_id is not None and (selected is None or lost[selected])
+        if n and len(track_ids) and not search_all:
+            iou = box_iou(predicted, boxes)
+            overlap = iou >= self.overlap_iou
+            tracks_per_det = overlap.sum(axis=0)
+            dets_per_track = overlap.sum(axis=1)
+            best = iou.argmax(axis=0)
+            for j in range(n):
+                t = best[j]
+                if (tracks_per_det[j] != 1 or dets_per_track[t] != 1
+                        or iou[t, j] < self.motion_iou or track_ids[t] not in self.cache):
+                    continue
+                feature, box, embedded_at = self.cache[track_ids[t]]
+                if t == selected:
+                    fresh = self.frame - embedded_at <= self.cache_frames
+                    if not fresh or box_iou(box[None], boxes[j:j + 1])[0, 0] < self.cache_iou:
+                        continue
+                sources[j] = track_ids[t]
+                features[j] = feature
+
+        missing = [j for j in range(n) if sources[j] is None]
+        if missing:
+            for j, feature in zip(missing, self.embedder(frame, boxes[missing])):
+                features[j] = feature
+        self.reused += n - len(missing)
+        self._sources = sources
+        self._boxes = boxes
+        self._features = features
+        return features
+
+    def commit(self, matched, track_ids):
+        """
+        更新缓存。
+
+        Args:
+            matched (list): (track_id, 检测下标)，本帧关联上的轨迹与检测。
+            track_ids (list): 更新后仍存在的全部轨迹。
+        """
+        for track_id, j in matched:
+            source = self._sources[j]
+            if source is None:
+                self.cache[track_id] = (self._features[j], self._boxes[j], self.frame)
+            elif source != track_id:
+                # 沿用的特征最终关联到了别的轨迹，缓存作废，下次重新提取
+                self.cache.pop(track_id, None)
+        alive = set(track_ids)
+        for track_id in [t for t in self.cache if t not in alive]:
+            del self.cache[track_id]
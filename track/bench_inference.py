@@ -0,0 +1,130 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+from bench_stats import summarize
+from box_ops import box_iou, greedy_match
+from inference_preprocess import Letterbox
+from inference_backend import load_detector, pin_cpus
+
+
+# ============================== 测试素材 ==============================
+def load_frames(path, count=200, step=1):
+    """从录像中每 step 帧取一帧，最多 count 帧"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+# ============================== 单个尺寸 ==============================
+def detect(model, letterbox, frame, size, conf):
+    image, transform = letterbox(frame, size)
+    results = model(image, imgsz=image.shape[:2], conf=conf, verbose=False)[0]
+    boxes = results.boxes.xyxy.cpu().numpy()
+    return Letterbox.to_source(boxes, transform)
+
+
+def run_size(model, frames, size, conf=0.25, warmup=5):
+    """在所有帧上以 size 推理，返回每帧检测框与耗时（毫秒）"""
+    letterbox = Letterbox((size,))
+    for frame in frames[:warmup]:
+        detect(model, letterbox, frame, size, conf)
+    boxes, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        boxes.append(detect(model, letterbox, frame, size, conf))
+        times.append((time.perf_counter() - start) * 1000.0)
+    return boxes, times
+
+
+def recall(predicted, reference, iou_threshold=0.5):
+    """以参考尺寸的检测结果为真值，统计被找回的比例"""
+    matched = total = 0
+    for pred, ref in zip(predicted, reference):
+        total += len(ref)
+        if len(ref) and len(pred):
+            matched += len(greedy_match(box_iou(ref, pred), iou_threshold))
+    return matched / total if total else None
+
+
+def sweep(model, frames, sizes, reference_size, conf=0.25, iou_threshold=0.5):
+    reference, _ = run_size(model, frames, reference_size, conf)
+    results = []
+    for size in sizes:
+        boxes, times = run_size(model, frames, size, conf)
+        results.append({
+            'size': size,
+            'fps': 1000.0 / (sum(times) / len(times)),
+            'latency_ms': summarize(times),
+            'recall': recall(boxes, reference, iou_threshold),
+            'detections_per_frame': float(np.mean([len(b) for b in boxes])),
+        })
+    return {'reference_size': reference_size,
+            'reference_detections_per_frame': float(np.mean([len(b) for b in reference])),
+            'sizes': results}
+
+
+# ============================== 主程序 ==============================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="推理尺寸扫描：在录像上比较各输入尺寸的帧率与检出率")
+    parser.add_argument('video', help="录像文件")
+    parser.add_argument('--model', default="yolov8n-face.pt", help="模型文件")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[320, 416, 512, 640, 800],
+                        help="待测推理尺寸（需为32的倍数）")
+    parser.add_argument('--reference-size', type=int, default=1280,
+                        help="以该尺寸的检测结果作为检出率的真值")
+    parser.add_argument('--frames', type=int, default=200, help="使用的帧数")
+    parser.add_argument('--step', type=int, default=1, help="每隔多少帧取一帧")
+    parser.add_argument('--conf', type=float, default=0.25, help="置信度阈值")
+    parser.add_argument('--iou', type=float, default=0.5, help="与真值匹配的IoU阈值")
+    parser.add_argument('--device', default='auto', help="推理设备：auto / cpu / cuda")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'torch', 'onnx', 'openvino'],
+                        help="推理后端")
+    parser.add_argument('--threads', type=int, default=None, help="CPU 推理线程数")
+    parser.add_argument('--cpus', type=int, nargs='+', default=None, help="推理绑定的 CPU 编号（仅 Linux）")
+    parser.add_argument('--output', default=None, help="结果JSON文件，缺省输出到标准输出")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.step)
+    if not frames:
+        sys.exit(f"无法从 {args.video} 读取画面")
+    model = load_detector(args.model, device=args.device, backend=args.backend, threads=args.threads,
+                          cpus=args.cpus)
+    pin_cpus(args.cpus)  # 本脚本在主线程推理
+
+    results = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'video': args.video,
+            'model': args.model,
+            'device': args.device,
+            'backend': args.backend,
+            'threads': args.threads,
+            'cpus': args.cpus,
+            'frames': len(frames),
+            'frame_size': [frames[0].shape[1], frames[0].shape[0]],
+        },
+        'sweep': sweep(model, frames, args.sizes, args.reference_size, args.conf, args.iou),
+    }
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已写入 {args.output}")
+    else:
+        print(text)
@@ -0,0 +1,173 @@
+import argparse
+import json
+import platform
+import struct
+import sys
+import threading
+import time
+from bench_stats import summarize
+from bench_transport import measure_round_trip
+from gimbal_link import open_link
+from gimbal_simulator import GimbalSimulator
+from serial_transport import SerialTransport
+from siyi_protocol import (crc16_cal, encode_angle, encode_trajectory, FrameDecoder,
+                           ATTITUDE_REQUEST, CommandTemplate, CMD_ATTITUDE)
+
+
+# ============================== 计时工具 ==============================
+def _rate(func, min_time=0.5):
+    """反复调用 func 至少 min_time 秒，返回每秒调用次数"""
+    count = 0
+    batch = 1
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            func()
+        count += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return count / elapsed
+        batch *= 2
+
+
+# ============================== 单项测试 ==============================
+def bench_crc(sizes=(8, 12, 64, 1024), min_time=0.5):
+    """CRC16 吞吐量（MB/s）与每次调用耗时（µs）"""
+    results = {}
+    for size in sizes:
+        data = bytes(range(256)) * (size // 256 + 1)
+        data = data[:size]
+        calls = _rate(lambda: crc16_cal(data), min_time)
+        results[str(size)] = {'mb_per_s': calls * size / 1e6, 'us_per_call': 1e6 / calls}
+    return results
+
+
+def _encode_legacy(yaw, pitch):
+    # 原 send_gimbal_control 的逐次分配写法，作为对照
+    cmd = bytearray([0x55, 0x66, 0x01, 0x04, 0x00, 0x00, 0x00, 0x0E])
+    cmd.extend(struct.pack('<h', int(yaw * 10)))
+    cmd.extend(struct.pack('<h', int(pitch * 10)))
+    cmd.extend(struct.pack('<H', crc16_cal(cmd)))
+    return cmd
+
+
+def bench_encode(trajectory_len=100, min_time=0.5):
+    """每秒编码的帧数"""
+    points = [(i * 0.5 - 25.0, -i * 0.2) for i in range(trajectory_len)]
+    trajectory_calls = _rate(lambda: encode_trajectory(points), min_time)
+    return {
+        'legacy_frames_per_s': _rate(lambda: _encode_legacy(12.3, -45.6), min_time),
+        'template_frames_per_s': _rate(lambda: encode_angle(12.3, -45.6), min_time),
+        'template_seq_frames_per_s': _rate(lambda: encode_angle(12.3, -45.6, seq=1234), min_time),
+        'trajectory_frames_per_s': trajectory_calls * trajectory_len,
+    }
+
+
+def bench_decode(frames=1000, chunk_sizes=(1, 64, 4096), min_time=0.5):
+    """每秒解码的帧数，按不同的读取块大小喂入"""
+    reply = CommandTemplate(CMD_ATTITUDE, '6h', ctrl=0x02)
+    stream = b''.join(reply.encode(i, -i, 0, 1, 2, 3, seq=i) for i in range(frames))
+    results = {}
+    for chunk in chunk_sizes:
+        chunks = [stream[i:i + chunk] for i in range(0, len(stream), chunk)]
+
+        def decode_all():
+            decoder = FrameDecoder()
+            for c in chunks:
+                decoder.feed(c)
+
+        results[str(chunk)] = {'frames_per_s': _rate(decode_all, min_time) * frames}
+    return results
+
+
+def measure_paced_latency(transport, rate_hz, duration=1.0):
+    """按固定频率发送姿态查询（允许多个在途），返回往返时间（毫秒）"""
+    samples = []
+    lock = threading.Lock()
+
+    def make_callback(start):
+        def on_reply(future):
+            if future.exception() is None:
+                with lock:
+                    samples.append((time.perf_counter() - start) * 1000.0)
+        return on_reply
+
+    interval = 1.0 / rate_hz
+    futures = []
+    next_time = time.perf_counter()
+    end = next_time + duration
+    while next_time < end:
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        futures.append(transport.request(ATTITUDE_REQUEST, callback=make_callback(time.perf_counter())))
+        next_time += interval
+    for future in futures:
+        try:
+            future.result()
+        except TimeoutError:
+            pass
+    return samples
+
+
+def bench_round_trip(port, count=200, rates=(10, 50, 100, 200), duration=1.0):
+    """往返延迟分位数，以及在不同查询频率下的延迟变化"""
+    link = open_link(port)
+    transport = SerialTransport(link, default_timeout=0.5).start()
+    try:
+        result = {'port': port, 'sequential_ms': summarize(measure_round_trip(transport, count))}
+        result['paced_ms'] = {f"{rate:g}": summarize(measure_paced_latency(transport, rate, duration))
+                              for rate in rates}
+    finally:
+        transport.close()
+        link.close()
+    result['timeouts'] = transport.timeouts
+    return result
+
+
+# ============================== 主程序 ==============================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SIYI 协议微基准：CRC / 编码 / 解码 / 往返延迟")
+    parser.add_argument('--port', action='append', default=None,
+                        help="往返测试的端口，可重复；缺省时使用本地伪终端与UDP模拟器")
+    parser.add_argument('--min-time', type=float, default=0.5, help="每个吞吐量测试的最短时长 (s)")
+    parser.add_argument('--count', type=int, default=200, help="顺序往返采样次数")
+    parser.add_argument('--rates', type=float, nargs='+', default=[10, 50, 100, 200],
+                        help="按频率发送时测试的查询频率 (Hz)")
+    parser.add_argument('--skip-round-trip', action='store_true', help="只测本地CPU开销")
+    parser.add_argument('--output', default=None, help="结果JSON文件，缺省输出到标准输出")
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+        },
+        'crc': bench_crc(min_time=args.min_time),
+        'encode': bench_encode(min_time=args.min_time),
+        'decode': bench_decode(min_time=args.min_time),
+        'round_trip': [],
+    }
+
+    if not args.skip_round_trip:
+        simulators = []
+        ports = args.port
+        if not ports:
+            simulators = [GimbalSimulator(latency=0.001).start(),
+                          GimbalSimulator(latency=0.001, baudrate=0, udp_bind=('127.0.0.1', 0)).start()]
+            ports = [sim.port for sim in simulators]
+        try:
+            for port in ports:
+                results['round_trip'].append(bench_round_trip(port, args.count, args.rates))
+        finally:
+            for sim in simulators:
+                sim.stop()
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已写入 {args.output}")
+    else:
+        print(text)
@@ -0,0 +1,11 @@
+import statistics
+
+
+# ============================== 统计 ==============================
+def summarize(samples):
+    """样本的数量、均值、分位数与最大值，样本不足两个时只给出数量"""
+    if len(samples) < 2:
+        return {'count': len(samples)}
+    q = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'count': len(samples), 'mean': statistics.fmean(samples),
+            'p50': q[49], 'p90': q[89], 'p99': q[98], 'max': max(samples)}
@@ -0,0 +1,93 @@
+import argparse
+import threading
+import time
+from bench_stats import summarize
+from gimbal_link import open_link
+from gimbal_simulator import GimbalSimulator
+from serial_transport import SerialTransport
+from siyi_protocol import ANGLE_COMMAND, ATTITUDE_REQUEST
+
+
+# ============================== 链路性能测试 ==============================
+def measure_round_trip(transport, count=200):
+    """逐个发送姿态查询，返回每次往返时间（毫秒）"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            transport.request(ATTITUDE_REQUEST).result()
+        except TimeoutError:
+            continue
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def measure_command_rate(transport, duration=2.0, window=8):
+    """保持 window 个角度指令在途，返回每秒收到ACK的指令数"""
+    slots = threading.BoundedSemaphore(window)
+    done = [0]
+
+    def on_ack(future):
+        if future.exception() is None:
+            done[0] += 1
+        slots.release()
+
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < duration:
+        slots.acquire()
+        i += 1
+        transport.request(ANGLE_COMMAND, i % 300 - 150, 0, callback=on_ack)
+    for _ in range(window):
+        slots.acquire()  # 等待所有在途指令完成或超时
+    return done[0] / (time.perf_counter() - start)
+
+
+def run_benchmark(name, port, count, duration, window):
+    link = open_link(port)
+    transport = SerialTransport(link, default_timeout=0.5).start()
+    try:
+        rtt = summarize(measure_round_trip(transport, count))
+        rate = measure_command_rate(transport, duration, window)
+    finally:
+        transport.close()
+        link.close()
+    return {'name': name, 'port': port, 'rtt_ms': rtt, 'commands_per_s': rate,
+            'timeouts': transport.timeouts}
+
+
+def print_result(result):
+    rtt = result['rtt_ms']
+    print(f"[{result['name']}] {result['port']}")
+    if 'p50' in rtt:
+        print(f"  往返延迟(ms): mean={rtt['mean']:.2f} p50={rtt['p50']:.2f} "
+              f"p90={rtt['p90']:.2f} p99={rtt['p99']:.2f} max={rtt['max']:.2f}")
+    else:
+        print(f"  往返延迟: 有效样本不足（{rtt['count']}）")
+    print(f"  最大指令速率: {result['commands_per_s']:.0f} 帧/s，超时 {result['timeouts']} 次")
+
+
+# ============================== 主程序 ==============================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="串口与UDP链路的往返延迟/指令速率对比")
+    parser.add_argument('--serial', default=None, help="真实串口名，缺省时使用伪终端模拟器")
+    parser.add_argument('--udp', default=None, help="udp://host:port，缺省时使用本地UDP模拟器")
+    parser.add_argument('--count', type=int, default=200, help="往返延迟采样次数")
+    parser.add_argument('--duration', type=float, default=2.0, help="指令速率测试时长 (s)")
+    parser.add_argument('--window', type=int, default=8, help="指令速率测试的在途请求数")
+    args = parser.parse_args()
+
+    simulators = []
+    if args.serial is None:
+        simulators.append(GimbalSimulator(latency=0.001).start())
+        args.serial = simulators[-1].port
+    if args.udp is None:
+        simulators.append(GimbalSimulator(latency=0.001, baudrate=0, udp_bind=('127.0.0.1', 0)).start())
+        args.udp = simulators[-1].port
+
+    try:
+        for name, port in (('serial', args.serial), ('udp', args.udp)):
+            print_result(run_benchmark(name, port, args.count, args.duration, args.window))
+    finally:
+        for sim in simulators:
+            sim.stop()
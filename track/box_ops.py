@@ -0,0 +1,46 @@
+import numpy as np
+
+
+# ============================== 检测框运算 ==============================
+def box_iou(a, b):
+    """
+    两组 xyxy 框两两之间的 IoU。
+
+    Args:
+        a (ndarray): (N, 4)。
+        b (ndarray): (M, 4)。
+
+    Returns:
+        ndarray: (N, M)。
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(iou, threshold=0.5):
+    """
+    按 IoU 从大到小贪心配对。
+
+    Returns:
+        list: [(行号, 列号), ...]，每行、每列最多出现一次。
+    """
+    if iou.size == 0:
+        return []
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows, used_cols, pairs = set(), set(), []
+    for k in order:
+        r, c = int(rows[k]), int(cols[k])
+        if r not in used_rows and c not in used_cols:
+            used_rows.add(r)
+            used_cols.add(c)
+            pairs.append((r, c))
+    return pairs
@@ -0,0 +1,79 @@
+import math
+import numpy as np
+
+
+# ============================== 相机模型 ==============================
+class CameraModel:
+    def __init__(self, hfov=81.0, vfov=62.1, zoom=1.0, distortion=(0.0, 0.0)):
+        """
+        针孔相机模型：把像素坐标换算为相对光轴的偏航/俯仰角。
+
+        视场角随变焦倍数变化（tan(fov/2) 与倍数成反比），可选径向畸变 (k1, k2)。
+        每个像素对应的角度偏移预先算成查找表，单次换算为 O(1)；分辨率或变焦
+        倍数变化时在下一次查询时重建。
+
+        Args:
+            hfov (float): 1 倍时的水平视场角（°）。
+            vfov (float): 1 倍时的垂直视场角（°）。
+            zoom (float): 当前变焦倍数。
+            distortion (tuple): 径向畸变系数 (k1, k2)，作用于归一化坐标。
+        """
+        self.hfov = hfov
+        self.vfov = vfov
+        self.zoom = max(float(zoom), 1.0)
+        self.distortion = distortion
+        self._table = None  # (H, W, 2) float32：[偏航, 俯仰] 偏移（°）
+        self._table_key = None
+
+    def set_zoom(self, zoom):
+        """更新变焦倍数，查找表在下一次查询时重建"""
+        self.zoom = max(float(zoom), 1.0)
+
+    def focal_lengths(self, width, height):
+        """当前变焦下的焦距 (fx, fy)（像素）"""
+        fx = (width / 2) * self.zoom / math.tan(math.radians(self.hfov) / 2)
+        fy = (height / 2) * self.zoom / math.tan(math.radians(self.vfov) / 2)
+        return fx, fy
+
+    def _build_table(self, width, height):
+        fx, fy = self.focal_lengths(width, height)
+        xd = ((np.arange(width, dtype=np.float64) - width / 2) / fx)[np.newaxis, :]
+        yd = ((np.arange(height, dtype=np.float64) - height / 2) / fy)[:, np.newaxis]
+        xd, yd = np.broadcast_arrays(xd, yd)
+        x, y = xd, yd
+        k1, k2 = self.distortion
+        if k1 or k2:
+            # 径向畸变的反解：不动点迭代
+            for _ in range(5):
+                r2 = x * x + y * y
+                scale = 1 + k1 * r2 + k2 * r2 * r2
+                x, y = xd / scale, yd / scale
+        table = np.empty((height, width, 2), dtype=np.float32)
+        table[..., 0] = np.degrees(np.arctan(x))
+        table[..., 1] = np.degrees(np.arctan2(y, np.sqrt(1 + x * x)))
+        self._table = table
+        self._table_key = (width, height, self.zoom, self.distortion)
+
+    def table(self, width, height):
+        """返回 (H, W, 2) 的角度偏移表，必要时重建"""
+        if self._table_key != (width, height, self.zoom, self.distortion):
+            self._build_table(width, height)
+        return self._table
+
+    def pixel_to_angle(self, x, y, frame_size):
+        """
+        像素坐标相对光轴的角度偏移。
+
+        Args:
+            x, y (float): 像素坐标。
+            frame_size (tuple): 画面尺寸 (宽, 高)。
+
+        Returns:
+            tuple: (偏航偏移, 俯仰偏移)（°），目标在右/下方时为正。
+        """
+        width, height = frame_size
+        table = self.table(width, height)
+        xi = min(max(int(x), 0), width - 1)
+        yi = min(max(int(y), 0), height - 1)
+        yaw, pitch = table[yi, xi]
+        return float(yaw), float(pitch)
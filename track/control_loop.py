@@ -0,0 +1,267 @@
+import math
+import queue
+import threading
+import time
+from collections import deque
+from tracking_controller import VelocityTrackController
+from target_predictor import TargetPredictor
+from camera_model import CameraModel
+from time_sync import compensate_motion
+
+YAW_LIMITS = (-135, 135)
+PITCH_LIMITS = (-90, 25)
+
+
+def _clamp(value, limits):
+    return max(min(value, limits[1]), limits[0])
+
+
+# ============================== 控制循环线程 ==============================
+class ControlLoop(threading.Thread):
+    def __init__(self, writer, transport, telemetry, rate_hz=50, track_mode='velocity',
+                 predict_model='cv', deadband=30, angle_interval=2.0, stale_after=0.5,
+                 jitter_window=500, zoom=1.0):
+        """
+        按固定频率运行的云台控制循环，与 Qt 事件循环解耦。
+
+        每个周期读取视觉线程发布的最新目标观测与遥测姿态，计算指令并交给发送线程。
+        周期以 time.monotonic() 上的绝对截止时刻调度，不随处理耗时累积漂移；
+        某个周期超时则跳过已错过的截止时刻并计数。
+        界面只投递意图（选中目标、点动、回中、开始/停止追踪），由本线程串行处理，
+        目标预测器与控制器只在本线程内访问。
+
+        Args:
+            writer (SerialWriter): 已启动的发送线程。
+            transport (SerialTransport): 用于估计串口延迟。
+            telemetry (AttitudeTelemetry): 姿态遥测。
+            rate_hz (float): 控制频率（Hz）。
+            track_mode (str): 'velocity' 逐周期转速闭环，'angle' 定时角度跳转。
+            predict_model (str): 目标预测模型，'cv' 或 'ca'。
+            deadband (int): 居中死区（像素）。
+            angle_interval (float): 角度模式下两次跳转的最小间隔（秒）。
+            stale_after (float): 目标观测超过该时长未更新视为丢失（秒）。
+            jitter_window (int): 统计周期抖动使用的样本数。
+            zoom (float): 相机当前的变焦倍数，变焦后用 set_zoom() 更新。
+        """
+        if track_mode not in ('velocity', 'angle'):
+            raise ValueError(f"未知的追踪模式: {track_mode}")
+        super().__init__(name="gimbal-control", daemon=True)
+        self.writer = writer
+        self.transport = transport
+        self.telemetry = telemetry
+        self.period = 1.0 / rate_hz
+        self.track_mode = track_mode
+        self.angle_interval = angle_interval
+        self.stale_after = stale_after
+        self.camera_model = CameraModel(zoom=zoom)  # 像素 → 角度换算随变焦倍数缩放
+        self.predictor = TargetPredictor(model=predict_model)  # 目标框中心的卡尔曼预测
+        self.velocity_controller = VelocityTrackController(deadband=deadband)
+        self.current_yaw = 0
+        self.current_pitch = 0
+        self._commanded = None  # 最近一次发出的角度指令，None 表示尚未发出，首个设定值总会发送
+        self.tracking_enabled = False
+        self._intents = queue.SimpleQueue()
+        self._observation = None  # 最新观测 (center, capture_time, frame_size, seq)，整体替换
+        self._obs_seq = 0
+        self._seen_seq = 0
+        self._last_observed = None  # 最近一次有效观测的采集时刻
+        self._frame_size = (1920, 1080)
+        self._nudge = (0.0, 0.0)  # 点动角速度 (°/s)
+        self._last_speed = None
+        self._last_angle_time = None
+        self._stop_event = threading.Event()
+        self._periods = deque(maxlen=jitter_window)
+        self.ticks = 0
+        self.missed = 0  # 错过的截止时刻数
+
+    # ---------- 界面 / 视觉线程调用的接口（任意线程） ----------
+    def observe(self, center, capture_time, frame_size):
+        """发布一帧的选中目标观测，center 为 None 表示本帧未找到目标"""
+        self._obs_seq += 1
+        self._observation = (center, capture_time, frame_size, self._obs_seq)
+
+    def post(self, intent, *args):
+        self._intents.put((intent, args))
+
+    def select_target(self):
+        """选中了新目标：清空预测器，等待新的观测"""
+        self.post('select')
+
+    def nudge(self, yaw_rate, pitch_rate):
+        """按住方向键期间以给定角速度（°/s）持续转动，(0, 0) 为松开"""
+        self.post('nudge', yaw_rate, pitch_rate)
+
+    def move(self, delta_yaw, delta_pitch):
+        """相对当前设定角度移动一步（°）"""
+        self.post('move', delta_yaw, delta_pitch)
+
+    def set_angle(self, yaw, pitch):
+        self.post('angle', yaw, pitch)
+
+    def home(self):
+        self.post('home')
+
+    def set_zoom(self, zoom):
+        """相机变焦倍数改变后调用，像素到角度的换算在控制线程中随之更新"""
+        self.post('zoom', zoom)
+
+    def start_tracking(self):
+        self.post('start')
+
+    def stop_tracking(self):
+        self.post('stop')
+
+    def stats(self):
+        """控制周期统计（毫秒）：平均周期、抖动标准差、最大偏差，以及超时次数"""
+        periods = list(self._periods)
+        if not periods:
+            return {'ticks': self.ticks, 'missed': self.missed, 'period_ms': None,
+                    'jitter_ms': None, 'max_jitter_ms': None}
+        mean = sum(periods) / len(periods)
+        std = math.sqrt(sum((p - mean) ** 2 for p in periods) / len(periods))
+        worst = max(abs(p - self.period) for p in periods)
+        return {'ticks': self.ticks, 'missed': self.missed, 'period_ms': mean * 1000,
+                'jitter_ms': std * 1000, 'max_jitter_ms': worst * 1000}
+
+    def close(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    # ---------- 控制线程 ----------
+    def run(self):
+        next_time = time.monotonic()
+        last_tick = None
+        while not self._stop_event.is_set():
+            delay = next_time - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+            now = time.monotonic()
+            if last_tick is not None:
+                self._periods.append(now - last_tick)
+            last_tick = now
+            try:
+                self._step(now)
+            except Exception as e:
+                print(f"[控制循环错误] {e}")
+            self.ticks += 1
+            next_time += self.period
+            overrun = time.monotonic() - next_time
+            if overrun > 0:
+                # 本周期超时：跳过已错过的截止时刻，不补发
+                skipped = int(overrun / self.period) + 1
+                self.missed += skipped
+                next_time += skipped * self.period
+
+    def _step(self, now):
+        while True:
+            try:
+                intent, args = self._intents.get_nowait()
+            except queue.Empty:
+                break
+            self._handle_intent(intent, args)
+
+        observation = self._observation
+        if observation is not None and observation[3] != self._seen_seq:
+            center, capture_time, frame_size, self._seen_seq = observation
+            self._frame_size = frame_size
+            if center is not None:
+                self.predictor.update(center, capture_time)
+                self._last_observed = capture_time
+
+        if self._nudge != (0.0, 0.0):
+            self._set_angle(self.current_yaw + self._nudge[0] * self.period,
+                            self.current_pitch + self._nudge[1] * self.period)
+
+        if not self.tracking_enabled:
+            return
+        target_lost = self._last_observed is None or now - self._last_observed > self.stale_after
+        if self.track_mode == 'velocity':
+            self._velocity_step(now, target_lost)
+        elif not target_lost:
+            self._angle_step(now)
+
+    def _handle_intent(self, intent, args):
+        if intent == 'select':
+            self.predictor.reset()
+            self._last_observed = None
+        elif intent == 'nudge':
+            self._nudge = (float(args[0]), float(args[1]))
+        elif intent == 'move':
+            self._set_angle(self.current_yaw + args[0], self.current_pitch + args[1])
+        elif intent == 'angle':
+            self._set_angle(*args)
+        elif intent == 'home':
+            self.current_yaw = 0
+            self.current_pitch = 0
+            self._commanded = (0, 0)
+            self.writer.home()
+        elif intent == 'zoom':
+            self.camera_model.set_zoom(args[0])
+        elif intent == 'start':
+            self.tracking_enabled = True
+            self.velocity_controller.reset()
+            self._last_speed = None
+            self._last_angle_time = None
+        elif intent == 'stop':
+            if self.tracking_enabled and self.track_mode == 'velocity':
+                self.writer.halt()
+            self.tracking_enabled = False
+            self.predictor.reset()
+            self._last_observed = None
+
+    def _set_angle(self, yaw, pitch):
+        yaw = _clamp(yaw, YAW_LIMITS)
+        pitch = _clamp(pitch, PITCH_LIMITS)
+        self.current_yaw = yaw
+        self.current_pitch = pitch
+        if (yaw, pitch) != self._commanded:
+            self._commanded = (yaw, pitch)
+            self.writer.set_angle(yaw, pitch)
+
+    def pose_at(self, t, max_age=0.5):
+        """时刻 t 的云台 (yaw, pitch)，与指令同一坐标：遥测未过期时按历史样本插值，否则用上一次的指令值"""
+        sample = self.telemetry.latest
+        if t is not None and sample is not None and time.monotonic() - sample.t < max_age:
+            pose = self.telemetry.pose_at(t)
+            return pose.yaw, pose.pitch
+        return self.current_yaw, self.current_pitch
+
+    def command_latency(self):
+        """
+        指令从发出到云台执行的估计延迟：发送线程排队 + 串口单程。
+
+        预测器按采集时刻建模，外推到绝对时刻 now + command_latency()，
+        采集到本周期之间的处理延迟已包含在内，无需另行估计。
+        """
+        one_way = self.transport.rtt / 2 if self.transport.rtt is not None else 0.005
+        return self.writer.interval / 2 + one_way
+
+    def _velocity_step(self, now, target_lost):
+        """速度模式：把指令生效时刻的预测瞄准点经 PID 转换为转速，目标丢失时停转"""
+        if target_lost:
+            self.velocity_controller.reset()
+            speed = (0, 0)
+        else:
+            aim = self.predictor.predict(now + self.command_latency())
+            # 目标坐标来自采集时刻的画面，扣除此后云台自身转动带来的画面位移
+            aim = compensate_motion(aim, self.pose_at(self._last_observed), self.pose_at(now),
+                                    self.camera_model.focal_lengths(*self._frame_size))
+            speed = self.velocity_controller.update(aim, self._frame_size, now)
+        if speed == (0, 0):
+            if self._last_speed != (0, 0):
+                self.writer.halt()
+        else:
+            self.writer.set_speed(*speed)
+        self._last_speed = speed
+
+    def _angle_step(self, now):
+        """角度模式：每 angle_interval 秒按预测瞄准点跳转一次"""
+        if self._last_angle_time is not None and now - self._last_angle_time < self.angle_interval:
+            return
+        self._last_angle_time = now
+        aim = self.predictor.predict(now + self.command_latency())
+        # 以目标所在帧采集时刻的云台姿态为基准，加上瞄准点相对光轴的角度偏移
+        base_yaw, base_pitch = self.pose_at(self._last_observed)
+        delta_yaw, delta_pitch = self.camera_model.pixel_to_angle(aim[0], aim[1], self._frame_size)
+        self._set_angle(base_yaw + delta_yaw, base_pitch + delta_pitch)
@@ -0,0 +1,53 @@
+import numpy as np
+from inference_preprocess import Letterbox
+
+# extract_detections 输出的列：左上角 x、y，宽、高，置信度，类别
+LEFT, TOP, WIDTH, HEIGHT, CONF, CLS = range(6)
+
+
+# ============================== 检测结果提取 ==============================
+def extract_detections(data, transform=None, offset=None, min_conf=0.0, classes=None,
+                       min_size=4.0, max_aspect=4.0):
+    """
+    把 YOLO 的 results.boxes.data 一次性转到主机内存并做向量化过滤。
+
+    Args:
+        data: results.boxes.data，(N, 6) 或带跟踪ID的 (N, 7)：xyxy, [id], conf, cls。
+        transform (tuple): Letterbox 返回的变换，给出时先映射回原图坐标。
+        offset (tuple): 再叠加的平移 (dx, dy)，如 ROI 窗口的左上角。
+        min_conf (float): 最低置信度。
+        classes (iterable): 保留的类别，None 表示全部保留。
+        min_size (float): 宽、高的最小值（像素）。
+        max_aspect (float): 宽高比上限，超出 [1/max_aspect, max_aspect] 的框丢弃。
+
+    Returns:
+        ndarray: (M, 6) float32，列为 [left, top, width, height, conf, cls]。
+    """
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim != 2 or len(data) == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    xyxy = data[:, :4] if transform is None else Letterbox.to_source(data[:, :4], transform)
+
+    out = np.empty((len(data), 6), dtype=np.float32)
+    out[:, LEFT:TOP + 1] = xyxy[:, :2]
+    out[:, WIDTH:HEIGHT + 1] = xyxy[:, 2:] - xyxy[:, :2]
+    out[:, CONF] = data[:, -2]
+    out[:, CLS] = data[:, -1]
+    if offset is not None:
+        out[:, LEFT] += offset[0]
+        out[:, TOP] += offset[1]
+
+    width, height = out[:, WIDTH], out[:, HEIGHT]
+    keep = (out[:, CONF] >= min_conf) & (width >= min_size) & (height >= min_size)
+    keep &= (width <= height * max_aspect) & (height <= width * max_aspect)
+    if classes is not None:
+        keep &= np.isin(out[:, CLS], np.asarray(list(classes), dtype=np.float32))
+    return out[keep]
+
+
+def to_deepsort(detections):
+    """转换为 DeepSort.update_tracks 的输入 [([l, t, w, h], conf, cls), ...]"""
+    return [(row[:4], row[4], int(row[5])) for row in detections.tolist()]
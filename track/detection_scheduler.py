@@ -0,0 +1,99 @@
+import math
+
+
+# ============================== 检测节奏调度 ==============================
+class DetectionScheduler:
+    def __init__(self, budget=1 / 30, min_interval=1, max_interval=8, max_drift=0.25,
+                 low_confidence=0.5, alpha=0.2):
+        """
+        决定哪些帧运行检测器，其余帧只让跟踪器用卡尔曼预测外推。
+
+        检测间隔 N 取以下约束的最小值：
+        - 耗时预算：检测级平均每帧耗时不超过 budget，即 N ≥ 检测耗时 / budget；
+        - 目标运动：两次检测之间选中目标的位移不超过框尺寸的 max_drift 倍；
+        - 置信度：选中目标的检测置信度低于 low_confidence 或本次未检出时每帧检测。
+        没有选中目标时只受耗时预算约束。
+
+        帧序号使用采集序号，采集线程丢弃的帧同样计入间隔。
+
+        Args:
+            budget (float): 检测级每帧的平均耗时预算（秒）。
+            min_interval, max_interval (int): 检测间隔的上下限（帧）。
+            max_drift (float): 两次检测间允许的目标位移（相对框的短边）。
+            low_confidence (float): 低于该置信度时每帧检测。
+            alpha (float): 检测耗时与目标速度的滑动平均系数。
+        """
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_drift = max_drift
+        self.low_confidence = low_confidence
+        self.alpha = alpha
+        self.detect_cost = None  # 检测器单次耗时（秒）
+        self.interval = min_interval
+        self.detections = 0
+        self.skipped = 0
+        self._last_detect_index = None
+        self.clear_target()
+
+    def clear_target(self):
+        self._target_box = None
+        self._target_index = None
+        self._target_speed = 0.0  # 像素/帧
+        self._target_confidence = None
+        self._target_lost = False
+        self._update_interval()
+
+    def should_detect(self, index):
+        """第 index 帧是否运行检测器"""
+        if self._last_detect_index is None or index - self._last_detect_index >= self.interval:
+            self._last_detect_index = index
+            self.detections += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def record_detection(self, seconds):
+        """记录一次检测器耗时"""
+        if self.detect_cost is None:
+            self.detect_cost = seconds
+        else:
+            self.detect_cost += self.alpha * (seconds - self.detect_cost)
+        self._update_interval()
+
+    def observe_target(self, index, box, confidence):
+        """
+        检测帧上选中目标的结果。
+
+        Args:
+            index (int): 帧序号。
+            box (tuple): 目标框 (x1, y1, x2, y2)，未检出时为 None。
+            confidence (float): 检测置信度，未知时为 None。
+        """
+        if box is None:
+            self._target_lost = True
+            self._update_interval()
+            return
+        if self._target_box is not None and index > self._target_index:
+            dx = (box[0] + box[2] - self._target_box[0] - self._target_box[2]) / 2
+            dy = (box[1] + box[3] - self._target_box[1] - self._target_box[3]) / 2
+            speed = math.hypot(dx, dy) / (index - self._target_index)
+            self._target_speed += self.alpha * (speed - self._target_speed)
+        self._target_box = box
+        self._target_index = index
+        self._target_confidence = confidence
+        self._target_lost = False
+        self._update_interval()
+
+    def _update_interval(self):
+        interval = self.max_interval
+        if self.detect_cost is not None and self.budget > 0:
+            interval = min(interval, math.ceil(self.detect_cost / self.budget))
+        if self._target_lost or (self._target_confidence is not None
+                                 and self._target_confidence < self.low_confidence):
+            interval = self.min_interval
+        elif self._target_box is not None and self._target_speed > 0:
+            x1, y1, x2, y2 = self._target_box
+            allowed = self.max_drift * max(min(x2 - x1, y2 - y1), 1)
+            interval = min(interval, int(allowed / self._target_speed))
+        self.interval = max(min(interval, self.max_interval), self.min_interval)
@@ -0,0 +1,84 @@
+import threading
+import time
+import cv2
+from time_sync import FrameClock
+
+
+# ============================== 视频采集线程 ==============================
+class FrameGrabber(threading.Thread):
+    def __init__(self, source, clock=None, buffer_size=1, fps=30):
+        """
+        独立线程持续解码视频流，只保留最新一帧。
+
+        解码结果写入单槽缓冲区，新帧直接覆盖尚未被取走的旧帧，处理线程每次
+        read() 都拿到最新画面，不会因处理慢于码流而在 FFmpeg/RTSP 缓冲中积压。
+        被覆盖而未处理的帧计入 dropped。采集时刻在解码返回时立即打戳。
+
+        Args:
+            source (str | int): cv2.VideoCapture 的输入（RTSP 地址、文件或设备号）。
+            clock (FrameClock): 采集时刻映射，缺省新建。
+            buffer_size (int): 传给 CAP_PROP_BUFFERSIZE，部分后端会忽略。
+            fps (float): 传给 CAP_PROP_FPS。
+        """
+        super().__init__(name="frame-grabber", daemon=True)
+        self.cap = cv2.VideoCapture(source)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
+        self.clock = clock or FrameClock()
+        self._cond = threading.Condition()
+        self._slot = None  # (frame, capture_time, index)
+        self._taken = 0  # 最近一次被取走的帧序号
+        self._running = True
+        self.captured = 0
+        self.dropped = 0  # 被新帧覆盖而未处理的帧数
+        self.finished = False  # 视频流结束或读取失败
+
+    def frame_size(self, default=(1920, 1080)):
+        """码流分辨率 (宽, 高)，后端未提供时返回 default"""
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or default[0],
+                int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or default[1])
+
+    def run(self):
+        try:
+            while self._running and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                capture_time = self.clock.stamp(self.cap.get(cv2.CAP_PROP_POS_MSEC), time.monotonic())
+                with self._cond:
+                    self.captured += 1
+                    if self._slot is not None and self._slot[2] > self._taken:
+                        self.dropped += 1
+                    self._slot = (frame, capture_time, self.captured)
+                    self._cond.notify_all()
+        finally:
+            # 由本线程释放：stop() 等待超时（如 RTSP 读取卡住）时不能在 cap.read() 进行中释放
+            self.cap.release()
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    def read(self, timeout=None):
+        """
+        取出最新一帧，没有新帧时等待。
+
+        Returns:
+            tuple: (frame, capture_time, index)；视频流结束或超时返回 None。
+        """
+        with self._cond:
+            ok = self._cond.wait_for(
+                lambda: (self._slot is not None and self._slot[2] > self._taken) or self.finished,
+                timeout)
+            if not ok or self._slot is None or self._slot[2] <= self._taken:
+                return None
+            self._taken = self._slot[2]
+            return self._slot
+
+    def stop(self):
+        """停止采集；线程退出循环时自行释放 cap，未启动时在此释放"""
+        self._running = False
+        if self.ident is None:
+            self.cap.release()
+        elif self.is_alive():
+            self.join(timeout=2)
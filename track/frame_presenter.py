@@ -0,0 +1,110 @@
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage
+
+# Qt 5.14 起支持直接显示 BGR 数据，更早的版本退回到在池缓冲区内做颜色转换
+_BGR888 = getattr(QImage, 'Format_BGR888', None)
+
+
+# ============================== 缓冲区池 ==============================
+class FramePool:
+    def __init__(self, count=3):
+        """
+        预分配的显示帧缓冲区池。
+
+        缓冲区按目标尺寸分配，尺寸不变时反复复用；尺寸变化（窗口缩放）时
+        重新分配，仍被界面持有的旧缓冲区在归还时直接丢弃。
+
+        Args:
+            count (int): 缓冲区数量，即同时在途（已发出、界面尚未显示）的最大帧数。
+        """
+        self.count = count
+        self._lock = threading.Lock()
+        self._shape = None
+        self._free = []
+        self._generation = 0
+
+    def acquire(self, shape):
+        """取出一块 shape 大小的空闲缓冲区，全部在用时返回 None"""
+        with self._lock:
+            if shape != self._shape:
+                self._shape = shape
+                self._generation += 1
+                self._free = [np.empty(shape, dtype=np.uint8) for _ in range(self.count)]
+            if not self._free:
+                return None
+            return self._free.pop(), self._generation
+
+    def release(self, buffer, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._free.append(buffer)
+
+
+# ============================== 显示帧 ==============================
+class PresentedFrame:
+    def __init__(self, pool, buffer, generation):
+        """
+        引用池缓冲区的 QImage，跨线程交给界面。
+
+        QImage 不拥有内存，界面把它转换为 QPixmap 后必须调用 release()
+        归还缓冲区；归还之前处理线程不会改写这块内存。
+        """
+        self._pool = pool
+        self._buffer = buffer
+        self._generation = generation
+        h, w = buffer.shape[:2]
+        fmt = _BGR888 if _BGR888 is not None else QImage.Format_RGB888
+        self.image = QImage(buffer.data, w, h, buffer.strides[0], fmt)
+
+    def release(self):
+        if self._buffer is not None:
+            self.image = None
+            self._pool.release(self._buffer, self._generation)
+            self._buffer = None
+
+
+# ============================== 画面输出 ==============================
+class FramePresenter:
+    def __init__(self, pool_size=3):
+        """
+        在处理线程中把帧缩放到显示尺寸并写入池缓冲区，界面线程只需转成 QPixmap。
+
+        缩放按 KeepAspectRatioByExpanding 的规则一次完成，直接写入预分配的缓冲区，
+        不做整帧的颜色转换和额外拷贝。界面来不及显示、缓冲区全部在用时跳过该帧。
+
+        Args:
+            pool_size (int): 缓冲区数量。
+        """
+        self.pool = FramePool(pool_size)
+        self.view_size = None  # 显示区域 (宽, 高)，None 表示按原尺寸输出
+        self.skipped = 0
+
+    def set_view_size(self, width, height):
+        self.view_size = (int(width), int(height)) if width > 0 and height > 0 else None
+
+    def output_size(self, frame_size):
+        """帧缩放后的尺寸：覆盖整个显示区域的最小等比缩放"""
+        if self.view_size is None:
+            return frame_size
+        scale = max(self.view_size[0] / frame_size[0], self.view_size[1] / frame_size[1])
+        return max(int(frame_size[0] * scale), 1), max(int(frame_size[1] * scale), 1)
+
+    def present(self, frame):
+        """返回 PresentedFrame，缓冲区全部在用时返回 None"""
+        h, w = frame.shape[:2]
+        out_w, out_h = self.output_size((w, h))
+        acquired = self.pool.acquire((out_h, out_w, 3))
+        if acquired is None:
+            self.skipped += 1
+            return None
+        buffer, generation = acquired
+        if (out_w, out_h) == (w, h):
+            np.copyto(buffer, frame)
+        else:
+            interpolation = cv2.INTER_AREA if out_w < w else cv2.INTER_LINEAR
+            cv2.resize(frame, (out_w, out_h), dst=buffer, interpolation=interpolation)
+        if _BGR888 is None:
+            cv2.cvtColor(buffer, cv2.COLOR_BGR2RGB, dst=buffer)
+        return PresentedFrame(self.pool, buffer, generation)
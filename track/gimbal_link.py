@@ -0,0 +1,73 @@
+import socket
+import serial
+
+SIYI_UDP_PORT = 37260  # SIYI 相机网口控制端口
+
+
+# ============================== UDP 链路 ==============================
+class UdpLink:
+    def __init__(self, host, port=SIYI_UDP_PORT, timeout=2):
+        """
+        通过 UDP 数据报收发 SIYI 协议帧。
+
+        提供与 serial.Serial 相同的 read / write / in_waiting / timeout 接口，
+        FrameDecoder 与 SerialTransport 可直接使用。每次 read 返回一个完整数据报，
+        忽略 size 参数，避免截断数据报。
+
+        Args:
+            host (str): 云台相机 IP，如 192.168.144.25。
+            port (int): 云台 UDP 控制端口。
+            timeout (float): 读超时（秒），None 表示阻塞。
+        """
+        self.name = f"udp://{host}:{port}"
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.connect((host, port))
+        self.timeout = timeout
+
+    @property
+    def timeout(self):
+        return self._sock.gettimeout()
+
+    @timeout.setter
+    def timeout(self, value):
+        self._sock.settimeout(value)
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def read(self, size=1):
+        try:
+            return self._sock.recv(65535)
+        except (socket.timeout, ConnectionRefusedError):
+            return b''
+
+    def write(self, data):
+        return self._sock.send(data)
+
+    def reset_input_buffer(self):
+        timeout = self._sock.gettimeout()
+        self._sock.setblocking(False)
+        try:
+            while True:
+                self._sock.recv(65535)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
+        finally:
+            self._sock.settimeout(timeout)
+
+    def close(self):
+        self._sock.close()
+
+
+def open_link(port, baudrate=115200, timeout=2):
+    """
+    按端口名打开云台链路。
+
+    "udp://host[:port]" 打开 UDP 链路，其余按串口名（COM15、/dev/ttyUSB0、
+    模拟器的 /dev/pts/N 等）打开 serial.Serial。
+    """
+    if port.startswith('udp://'):
+        host, _, udp_port = port[len('udp://'):].partition(':')
+        return UdpLink(host, int(udp_port) if udp_port else SIYI_UDP_PORT, timeout=timeout)
+    return serial.Serial(port, baudrate, timeout=timeout)
@@ -0,0 +1,253 @@
+import argparse
+import heapq
+import os
+import random
+import socket
+import threading
+import time
+from siyi_protocol import (FrameDecoder, CommandTemplate, CMD_ROTATION, CMD_CENTER,
+                           CMD_ATTITUDE, CMD_SET_ANGLE, CMD_DATA_STREAM, STREAM_ATTITUDE,
+                           STREAM_FREQS, pitch_to_device)
+
+# 云台应答帧模板（CTRL=0x02 表示应答）
+_ATTITUDE_REPLY = CommandTemplate(CMD_ATTITUDE, '6h', ctrl=0x02)
+_ANGLE_REPLY = CommandTemplate(CMD_SET_ANGLE, '3h', ctrl=0x02)
+_ROTATION_REPLY = CommandTemplate(CMD_ROTATION, 'B', ctrl=0x02)
+_CENTER_REPLY = CommandTemplate(CMD_CENTER, 'B', ctrl=0x02)
+_STREAM_REPLY = CommandTemplate(CMD_DATA_STREAM, 'B', ctrl=0x02)
+
+
+# ============================== 云台模拟器 ==============================
+class GimbalSimulator:
+    def __init__(self, slew_rate=120.0, max_speed=90.0, yaw_limits=(-135.0, 135.0),
+                 pitch_limits=(-90.0, 25.0), latency=0.002, drop_rate=0.0,
+                 baudrate=115200, tick=0.002, seed=None, udp_bind=None):
+        """
+        在 Linux 伪终端（或本地 UDP 端口）上模拟 SIYI 云台，协议与真实云台一致。
+
+        支持 0x0E 绝对角度、0x08 回中、0x07 转速、0x0D 姿态查询、0x25 姿态推送，
+        并回复对应 ACK。可配置转动速度、轴限位、串口延迟、线速率与随机丢字节，
+        把 VideoThread / controlCamera / testCamera 的串口名换成 port 即可联调。
+
+        Args:
+            slew_rate (float): 角度模式下的最大转动速度（°/s）。
+            max_speed (float): 0x07 速度指令为 ±100 时对应的转速（°/s）。
+            yaw_limits (tuple): 偏航角范围（°），与 control_gimbal 的校验一致。
+            pitch_limits (tuple): 俯仰角范围（°）。
+            latency (float): 处理指令到发出应答的固定延迟（秒）。
+            drop_rate (float): 收发每个字节被丢弃的概率。
+            baudrate (int): 模拟的串口波特率，用于计算线上传输时间，0 表示不计。
+            tick (float): 物理模型的更新周期（秒）。
+            seed (int): 随机数种子，便于复现丢字节场景。
+            udp_bind (tuple): 给定 (host, port) 时改为监听 UDP，port 为 "udp://host:port"，
+                可直接传给 open_link；此时 drop_rate 作用于整个数据报。
+        """
+        self.slew_rate = slew_rate
+        self.max_speed = max_speed
+        self.yaw_limits = yaw_limits
+        self.pitch_limits = pitch_limits
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.baudrate = baudrate
+        self.tick = tick
+        self._random = random.Random(seed)
+
+        self.yaw = 0.0
+        self.pitch = 0.0
+        self.roll = 0.0
+        self.yaw_vel = 0.0
+        self.pitch_vel = 0.0
+        self._target = (0.0, 0.0)
+        self._speed = None  # 速度模式下的 (yaw°/s, pitch°/s)
+        self._stream_period = 0.0
+        self._next_stream = 0.0
+
+        self._decoder = FrameDecoder(parse=False)
+        self._outbox = []  # (发送时刻, 序号, 数据)
+        self._out_count = 0
+        self._wire_free = 0.0  # 模拟串口线空闲的时刻
+        self.received = 0
+        self.replied = 0
+
+        self._sock = None
+        self._peer = None
+        if udp_bind is not None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.bind(udp_bind)
+            self._sock.settimeout(tick)  # 接收带超时，兼作主循环的等待
+            host, udp_port = self._sock.getsockname()
+            self.port = f"udp://{host}:{udp_port}"
+        else:
+            import tty  # 伪终端只在 Linux 上可用，UDP 模式不依赖 tty / termios
+            self._master, self._slave = os.openpty()
+            tty.setraw(self._slave)
+            os.set_blocking(self._master, False)
+            self.port = os.ttyname(self._slave)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="gimbal-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+        else:
+            os.close(self._master)
+            os.close(self._slave)
+
+    # ---------------------------- 主循环 ----------------------------
+    def _loop(self):
+        if self._sock is None:
+            import select
+        last = time.monotonic()
+        while self._running:
+            if self._sock is not None:
+                data = self._receive()  # 最多等待 tick 秒
+            else:
+                readable, _, _ = select.select([self._master], [], [], self.tick)
+                data = self._receive() if readable else b''
+            now = time.monotonic()
+            if data:
+                for msg in self._decoder.feed(data):
+                    self._handle(msg, now)
+            self._update(now - last)
+            last = now
+            if self._stream_period and now >= self._next_stream:
+                self._next_stream = now + self._stream_period
+                self._reply(_ATTITUDE_REPLY, 0, now, *self._attitude_values())
+            self._flush(now)
+
+    def _drop(self, data):
+        if not self.drop_rate:
+            return data
+        if self._sock is not None:
+            return data if self._random.random() >= self.drop_rate else b''
+        return bytes(b for b in data if self._random.random() >= self.drop_rate)
+
+    def _receive(self):
+        try:
+            if self._sock is not None:
+                data, self._peer = self._sock.recvfrom(65535)
+            else:
+                data = os.read(self._master, 4096)
+        except (BlockingIOError, OSError):
+            return b''
+        return self._drop(data)
+
+    def _send(self, frame):
+        frame = self._drop(frame)
+        if not frame:
+            return
+        if self._sock is not None:
+            if self._peer is not None:
+                self._sock.sendto(frame, self._peer)
+        else:
+            os.write(self._master, frame)
+
+    def _update(self, dt):
+        """按转动速度与限位更新云台角度"""
+        if self._speed is not None:
+            yaw_rate, pitch_rate = self._speed
+            new_yaw = self._clamp(self.yaw + yaw_rate * dt, self.yaw_limits)
+            new_pitch = self._clamp(self.pitch + pitch_rate * dt, self.pitch_limits)
+        else:
+            step = self.slew_rate * dt
+            new_yaw = self.yaw + max(min(self._target[0] - self.yaw, step), -step)
+            new_pitch = self.pitch + max(min(self._target[1] - self.pitch, step), -step)
+        if dt > 0:
+            self.yaw_vel = (new_yaw - self.yaw) / dt
+            self.pitch_vel = (new_pitch - self.pitch) / dt
+        self.yaw, self.pitch = new_yaw, new_pitch
+
+    @staticmethod
+    def _clamp(value, limits):
+        return max(min(value, limits[1]), limits[0])
+
+    def _attitude_values(self):
+        # 与真实云台一致，俯仰角按云台的上报方式编码
+        pitch, pitch_vel = pitch_to_device(self.pitch, self.pitch_vel)
+        return (int(self.yaw * 10), int(round(pitch * 10)), int(self.roll * 10),
+                int(self.yaw_vel * 10), int(round(pitch_vel * 10)), 0)
+
+    # ---------------------------- 指令处理 ----------------------------
+    def _handle(self, msg, now):
+        self.received += 1
+        if msg.cmd_id == CMD_SET_ANGLE and len(msg.data) >= 4:
+            yaw = int.from_bytes(msg.data[0:2], 'little', signed=True) / 10.0
+            pitch = int.from_bytes(msg.data[2:4], 'little', signed=True) / 10.0
+            self._speed = None
+            self._target = (self._clamp(yaw, self.yaw_limits), self._clamp(pitch, self.pitch_limits))
+            self._reply(_ANGLE_REPLY, msg.seq, now, *self._attitude_values()[:3])
+        elif msg.cmd_id == CMD_ROTATION and len(msg.data) >= 2:
+            yaw_speed = int.from_bytes(msg.data[0:1], 'little', signed=True)
+            pitch_speed = int.from_bytes(msg.data[1:2], 'little', signed=True)
+            if yaw_speed == 0 and pitch_speed == 0:
+                self._speed = None
+                self._target = (self.yaw, self.pitch)
+            else:
+                self._speed = (yaw_speed * self.max_speed / 100.0, pitch_speed * self.max_speed / 100.0)
+            self._reply(_ROTATION_REPLY, msg.seq, now, 1)
+        elif msg.cmd_id == CMD_CENTER:
+            self._speed = None
+            self._target = (0.0, 0.0)
+            self._reply(_CENTER_REPLY, msg.seq, now, 1)
+        elif msg.cmd_id == CMD_ATTITUDE:
+            self._reply(_ATTITUDE_REPLY, msg.seq, now, *self._attitude_values())
+        elif msg.cmd_id == CMD_DATA_STREAM and len(msg.data) >= 2:
+            if msg.data[0] == STREAM_ATTITUDE:
+                freq = STREAM_FREQS.get(msg.data[1], 0)
+                self._stream_period = 1.0 / freq if freq else 0.0
+                self._next_stream = now
+            self._reply(_STREAM_REPLY, msg.seq, now, msg.data[0])
+
+    def _reply(self, template, seq, now, *values):
+        frame = template.encode(*values, seq=seq)
+        send_time = now + self.latency
+        if self.baudrate:
+            # 按 10 bit/字节 计算线上传输时间，前一帧未发完时排队
+            send_time = max(send_time, self._wire_free) + len(frame) * 10.0 / self.baudrate
+            self._wire_free = send_time
+        self._out_count += 1
+        heapq.heappush(self._outbox, (send_time, self._out_count, frame))
+
+    def _flush(self, now):
+        while self._outbox and self._outbox[0][0] <= now:
+            _, _, frame = heapq.heappop(self._outbox)
+            try:
+                self._send(frame)
+                self.replied += 1
+            except (BlockingIOError, OSError):
+                pass  # 对端未读取导致缓冲区满时丢弃，与真实串口溢出一致
+
+
+# ============================== 主程序 ==============================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SIYI 云台伪终端模拟器")
+    parser.add_argument('--slew-rate', type=float, default=120.0, help="角度模式转动速度 (°/s)")
+    parser.add_argument('--max-speed', type=float, default=90.0, help="速度指令 ±100 对应转速 (°/s)")
+    parser.add_argument('--latency', type=float, default=0.002, help="应答延迟 (s)")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="丢字节概率")
+    parser.add_argument('--baudrate', type=int, default=115200, help="模拟波特率，0 表示不计传输时间")
+    parser.add_argument('--udp', type=int, default=None, metavar='PORT', help="改为监听本地 UDP 端口")
+    args = parser.parse_args()
+
+    sim = GimbalSimulator(slew_rate=args.slew_rate, max_speed=args.max_speed, latency=args.latency,
+                          drop_rate=args.drop_rate, baudrate=0 if args.udp is not None else args.baudrate,
+                          udp_bind=('127.0.0.1', args.udp) if args.udp is not None else None).start()
+    print(f"模拟云台已启动，端口: {sim.port}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(1)
+            print(f"Yaw={sim.yaw:.1f}° Pitch={sim.pitch:.1f}° 收到 {sim.received} 帧，应答 {sim.replied} 帧")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
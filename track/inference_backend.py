@@ -0,0 +1,184 @@
+import importlib.util
+import os
+import numpy as np
+from ultralytics import YOLO
+
+# 导出格式 → 导出产物相对模型文件的命名（与 ultralytics 的导出命名一致）
+EXPORT_SUFFIX = {'onnx': '.onnx', 'openvino': '_openvino_model'}
+# CPU 上自动选择后端时的优先顺序，对应的运行时包
+CPU_BACKENDS = (('openvino', 'openvino'), ('onnx', 'onnxruntime'))
+
+
+# ============================== 设备与后端选择 ==============================
+def select_device(device='auto'):
+    """'auto' 时有 CUDA 用 'cuda'，否则用 'cpu'"""
+    if device != 'auto':
+        return device
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return 'cuda'
+    except ImportError:
+        pass
+    return 'cpu'
+
+
+def select_backend(backend, device):
+    """'auto' 时 GPU 用 PyTorch，CPU 依次尝试 OpenVINO、ONNX Runtime，都没有时退回 PyTorch"""
+    if backend != 'auto':
+        return backend
+    if device != 'cpu':
+        return 'torch'
+    for name, package in CPU_BACKENDS:
+        if importlib.util.find_spec(package) is not None:
+            return name
+    return 'torch'
+
+
+def export_model(model_path, fmt, imgsz=640):
+    """
+    把 .pt 模型导出为 fmt 格式并缓存在模型旁边，已有且不旧于模型文件时直接复用。
+
+    导出为动态输入尺寸，ROI 与多推理尺寸都能直接使用。
+    """
+    stem, _ = os.path.splitext(model_path)
+    target = stem + EXPORT_SUFFIX[fmt]
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path):
+        return target
+    print(f"[推理] 导出 {model_path} → {target}")
+    exported = YOLO(model_path).export(format=fmt, imgsz=imgsz, dynamic=True, half=False)
+    return str(exported)
+
+
+def exported_format(model_path):
+    """已导出（含量化后）模型的格式，.pt 等原始模型返回 None"""
+    path = model_path.rstrip('/\\')
+    if path.endswith('.onnx'):
+        return 'onnx'
+    if path.endswith('_openvino_model') or path.endswith('.xml'):
+        return 'openvino'
+    return None
+
+
+def pin_cpus(cpus):
+    """
+    把当前线程（及此后由它创建的线程）绑定到指定 CPU，仅 Linux 支持。
+
+    Returns:
+        set: 绑定前的 CPU 集合，未绑定时返回 None。
+    """
+    if not cpus:
+        return None
+    if not hasattr(os, 'sched_setaffinity'):
+        print("[推理] 当前系统不支持设置 CPU 亲和性，已忽略")
+        return None
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, set(cpus))
+    return previous
+
+
+def _tune_runtime(backend, fmt, threads, pinned):
+    """
+    用指定线程数重建 AutoBackend 内部的 ONNX Runtime 会话 / OpenVINO 编译模型。
+
+    这些属性属于 ultralytics 的内部实现，随版本可能改名或不存在，缺少时不做改动。
+
+    Returns:
+        bool: 是否已按配置重建。
+    """
+    if fmt == 'onnx':
+        session, weights = getattr(backend, 'session', None), getattr(backend, 'w', None)
+        if session is None or weights is None:
+            return False
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        backend.session = ort.InferenceSession(str(weights), sess_options=options,
+                                               providers=session.get_providers())
+        return True
+    if fmt == 'openvino':
+        core, ov_model = getattr(backend, 'core', None), getattr(backend, 'ov_model', None)
+        if core is None or ov_model is None or not hasattr(backend, 'ov_compiled_model'):
+            return False
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        if pinned:
+            config['ENABLE_CPU_PINNING'] = True
+        backend.ov_compiled_model = core.compile_model(ov_model, 'CPU', config=config)
+        return True
+    return False
+
+
+_tune_warned = False
+
+
+def _load_exported(path, fmt, threads, pinned, imgsz):
+    global _tune_warned
+    model = YOLO(path, task='detect')
+    # 第一次推理才会创建 AutoBackend，之后再按线程配置重建运行时
+    model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, device='cpu', verbose=False)
+    backend = getattr(getattr(model, 'predictor', None), 'model', None)
+    try:
+        tuned = _tune_runtime(backend, fmt, threads, pinned)
+        reason = "当前 ultralytics 版本的 AutoBackend 中没有对应的运行时对象"
+    except Exception as e:
+        tuned, reason = False, e
+    if not tuned and not _tune_warned:
+        _tune_warned = True
+        print(f"[推理] 无法调整 {fmt} 运行时的线程与 CPU 绑定，使用默认配置: {reason}")
+    print(f"[推理] 后端: {fmt} (cpu, {path}, 线程: {threads if tuned and threads else '默认'})")
+    return model
+
+
+# ============================== 加载检测模型 ==============================
+def load_detector(model_path, device='auto', backend='auto', threads=None, cpus=None, imgsz=640):
+    """
+    加载检测模型，按运行环境选择设备与推理后端。
+
+    有 GPU 时与原来一样用 PyTorch 在 CUDA 上推理；只有 CPU 时把模型导出为
+    OpenVINO IR 或 ONNX（缓存在模型文件旁边），由对应的 CPU 运行时推理。
+    返回的仍是 ultralytics 的 YOLO 对象，调用方式与 NMS 等后处理保持不变。
+
+    Args:
+        model_path (str): .pt 模型路径，或已导出/量化的 .onnx 文件、*_openvino_model 目录。
+        device (str): 'auto'、'cpu'、'cuda' 或 'cuda:N'。
+        backend (str): 'auto'、'torch'、'onnx' 或 'openvino'。
+        threads (int): CPU 推理线程数，None 为运行时默认值。
+        cpus (iterable): 绑定的 CPU 编号，仅 Linux 生效。加载期间创建的运行时线程池
+            绑定到这些 CPU，调用线程的亲和性在返回前恢复；实际执行推理的线程需自行
+            调用 pin_cpus(cpus)。
+        imgsz (int): 导出与预热使用的输入尺寸。
+    """
+    previous = pin_cpus(cpus)
+    try:
+        return _load_detector(model_path, device, backend, threads, previous is not None, imgsz)
+    finally:
+        if previous is not None:
+            os.sched_setaffinity(0, previous)
+
+
+def _load_detector(model_path, device, backend, threads, pinned, imgsz):
+    fmt = exported_format(model_path)
+    if fmt is not None:
+        # 直接给出导出/量化后的模型时按其格式加载，不再回退
+        return _load_exported(model_path, fmt, threads, pinned, imgsz)
+
+    device = select_device(device)
+    backend = select_backend(backend, device)
+    if backend != 'torch':
+        try:
+            return _load_exported(export_model(model_path, backend, imgsz), backend, threads, pinned, imgsz)
+        except Exception as e:
+            print(f"[推理] {backend} 后端不可用，改用 PyTorch: {e}")
+
+    model = YOLO(model_path).to(device)
+    if device == 'cpu' and threads:
+        import torch
+        torch.set_num_threads(threads)
+    print(f"[推理] 后端: torch ({device})")
+    return model
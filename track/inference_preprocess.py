@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+
+# ============================== 推理前处理 ==============================
+class Letterbox:
+    def __init__(self, sizes=(640,), stride=32, pad_value=114):
+        """
+        把画面等比缩放并填充到推理尺寸，检测框可精确映射回原图坐标。
+
+        每个推理尺寸对应一块预分配的画布，缩放结果直接写入画布中部，
+        每帧只重填边框，不再分配新的图像内存。配置多个尺寸时，
+        按输入的长边选用不小于它的最小尺寸，都小于长边时用最大的尺寸。
+
+        Args:
+            sizes (tuple): 推理尺寸，每项为边长 int 或 (宽, 高)，需为 stride 的整数倍。
+            stride (int): 网络下采样步长。
+            pad_value (int): 填充像素值，与 ultralytics 一致取 114。
+        """
+        self.sizes = sorted((self._as_wh(s) for s in sizes), key=max)
+        self.stride = stride
+        self.pad_value = pad_value
+        self._canvases = {}
+
+    @staticmethod
+    def _as_wh(size):
+        return (size, size) if isinstance(size, int) else tuple(size)
+
+    def select(self, image):
+        """按输入长边选用推理尺寸 (宽, 高)"""
+        side = max(image.shape[:2])
+        for size in self.sizes:
+            if max(size) >= side:
+                return size
+        return self.sizes[-1]
+
+    def __call__(self, image, size=None):
+        """
+        缩放并填充到推理尺寸。
+
+        Args:
+            image (ndarray): HxWx3 图像，可以是原图的切片。
+            size (int | tuple): 推理尺寸，缺省按 select() 选取。
+
+        Returns:
+            tuple: (画布, 变换)。画布在下一次同尺寸调用时被覆盖；
+                变换 (sx, sy, pad_x, pad_y, 原宽, 原高) 供 to_source() 使用。
+        """
+        out_w, out_h = self.select(image) if size is None else self._as_wh(size)
+        h, w = image.shape[:2]
+        r = min(out_w / w, out_h / h)
+        new_w, new_h = max(int(round(w * r)), 1), max(int(round(h * r)), 1)
+        pad_x, pad_y = (out_w - new_w) // 2, (out_h - new_h) // 2
+
+        canvas = self._canvases.get((out_w, out_h))
+        if canvas is None:
+            canvas = np.full((out_h, out_w, 3), self.pad_value, dtype=np.uint8)
+            self._canvases[(out_w, out_h)] = canvas
+        else:
+            canvas[:pad_y] = self.pad_value
+            canvas[pad_y + new_h:] = self.pad_value
+            canvas[pad_y:pad_y + new_h, :pad_x] = self.pad_value
+            canvas[pad_y:pad_y + new_h, pad_x + new_w:] = self.pad_value
+
+        region = canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w]
+        if (new_w, new_h) == (w, h):
+            np.copyto(region, image)
+        else:
+            interpolation = cv2.INTER_AREA if r < 1 else cv2.INTER_LINEAR
+            resized = cv2.resize(image, (new_w, new_h), dst=region, interpolation=interpolation)
+            if resized.ctypes.data != region.ctypes.data:
+                np.copyto(region, resized)  # 后端未能原地写入时补一次拷贝
+        # 按实际缩放后的像素网格求逆，避免取整带来的偏差
+        return canvas, (w / new_w, h / new_h, pad_x, pad_y, w, h)
+
+    @staticmethod
+    def to_source(boxes, transform):
+        """把画布坐标下的 xyxy 框 (..., 4) 映射回原图坐标并裁剪到原图范围内"""
+        sx, sy, pad_x, pad_y, w, h = transform
+        boxes = np.array(boxes, dtype=np.float32, copy=True)
+        boxes[..., [0, 2]] = np.clip((boxes[..., [0, 2]] - pad_x) * sx, 0, w)
+        boxes[..., [1, 3]] = np.clip((boxes[..., [1, 3]] - pad_y) * sy, 0, h)
+        return boxes
@@ -0,0 +1,202 @@
+import threading
+import cv2
+import numpy as np
+
+# OpenCV 单目标跟踪器的构造函数名，opencv-contrib 中位于 cv2 或 cv2.legacy
+OPENCV_TRACKERS = {'kcf': 'TrackerKCF_create', 'csrt': 'TrackerCSRT_create', 'mosse': 'TrackerMOSSE_create'}
+
+
+def _to_xywh(ltrb):
+    x1, y1, x2, y2 = (int(round(v)) for v in ltrb)
+    return x1, y1, max(x2 - x1, 1), max(y2 - y1, 1)
+
+
+def _patch(gray, ltrb, size):
+    """框内图像缩放到 size × size，框超出画面时裁到画面内"""
+    height, width = gray.shape[:2]
+    x1, y1, x2, y2 = (int(round(v)) for v in ltrb)
+    x1, y1 = min(max(x1, 0), width - 1), min(max(y1, 0), height - 1)
+    x2, y2 = min(max(x2, x1 + 1), width), min(max(y2, y1 + 1), height)
+    return cv2.resize(gray[y1:y2, x1:x2], (size, size))
+
+
+def _gray(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+# ============================== 模板匹配跟踪器 ==============================
+class TemplateTracker:
+    def __init__(self, search_scale=2.0, min_score=0.3):
+        """
+        没有 opencv-contrib 时的后备单目标跟踪器：在上一帧位置附近的搜索窗口内
+        做归一化互相关模板匹配，接口与 OpenCV 跟踪器相同（init / update）。
+        """
+        self.search_scale = search_scale
+        self.min_score = min_score
+        self._template = None
+        self._box = None
+
+    def init(self, frame, xywh):
+        x, y, w, h = xywh
+        gray = _gray(frame)
+        self._template = gray[max(y, 0):y + h, max(x, 0):x + w].copy()
+        self._box = (x, y, self._template.shape[1], self._template.shape[0])
+
+    def update(self, frame):
+        gray = _gray(frame)
+        height, width = gray.shape[:2]
+        x, y, w, h = self._box
+        mx, my = int(w * (self.search_scale - 1) / 2), int(h * (self.search_scale - 1) / 2)
+        sx1, sy1 = max(x - mx, 0), max(y - my, 0)
+        sx2, sy2 = min(x + w + mx, width), min(y + h + my, height)
+        if sx2 - sx1 < w or sy2 - sy1 < h:
+            return False, self._box
+        scores = cv2.matchTemplate(gray[sy1:sy2, sx1:sx2], self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (px, py) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return False, self._box
+        self._box = (sx1 + px, sy1 + py, w, h)
+        return True, self._box
+
+
+def _opencv_factory(kind):
+    name = OPENCV_TRACKERS.get(kind)
+    for module in (cv2, getattr(cv2, 'legacy', None)):
+        if name and module is not None and hasattr(module, name):
+            return getattr(module, name)
+    return None
+
+
+def create_single_tracker(kind):
+    """创建 OpenCV 单目标跟踪器，'template' 或当前 OpenCV 不提供时用 TemplateTracker"""
+    factory = _opencv_factory(kind)
+    return factory() if factory is not None else TemplateTracker()
+
+
+# ============================== 锁定跟踪 ==============================
+class LockOnTracker:
+    def __init__(self, kind='kcf', verify_every=15, min_score=0.5, retry_interval=3,
+                 max_misses=2, template_size=32):
+        """
+        锁定目标后的快速路径：单目标跟踪器逐帧更新目标框，检测器只用于校验。
+
+        每 verify_every 帧，或目标框与锁定时外观的相关系数低于 min_score 时，
+        请求一次检测；检测到的目标框用于重新初始化跟踪器。连续 max_misses 次
+        检测都没有找到目标即判定丢失，停止锁定，由调用方恢复常规检测。
+
+        start / stop / update / reanchor / miss 在跟踪线程调用，wants_detection 在
+        检测线程调用；两者共享的状态由内部锁保护，跟踪器本身的计算在锁外进行。
+
+        Args:
+            kind (str): 'kcf'、'csrt'、'mosse'（需要 opencv-contrib）或 'template'。
+            verify_every (int): 定期校验的间隔（帧）。
+            min_score (float): 外观相关系数低于该值时提前请求检测。
+            retry_interval (int): 相关系数持续偏低时两次请求之间的最小间隔（帧）。
+            max_misses (int): 允许连续校验失败的次数。
+            template_size (int): 计算外观相关系数时框内图像缩放到的边长。
+        """
+        if kind != 'template' and _opencv_factory(kind) is None:
+            print(f"[锁定] 当前 OpenCV 不支持 {kind} 跟踪器，改用模板匹配")
+            kind = 'template'
+        self.kind = kind
+        self.verify_every = verify_every
+        self.min_score = min_score
+        self.retry_interval = retry_interval
+        self.max_misses = max_misses
+        self.template_size = template_size
+        self.target = None
+        self.box = None
+        self.score = None
+        self.velocity = (0.0, 0.0)  # 像素/帧
+        self.misses = 0
+        self.reanchors = 0
+        self._tracker = None
+        self._template = None
+        self._last_request = None
+        self._state_lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.box is not None
+
+    def start(self, frame, ltrb, index, target=None):
+        """锁定 target（轨迹 ID）的目标框 ltrb"""
+        self._anchor(frame, ltrb, target=target, index=index)
+
+    def stop(self):
+        with self._state_lock:
+            self.box = None
+            self.score = None
+            self.target = None
+            self._tracker = None
+
+    def _anchor(self, frame, ltrb, target=None, index=None):
+        tracker = create_single_tracker(self.kind)
+        tracker.init(frame, _to_xywh(ltrb))
+        template = _patch(_gray(frame), ltrb, self.template_size)
+        with self._state_lock:
+            if index is not None:
+                # 新的锁定
+                self.target = target
+                self.velocity = (0.0, 0.0)
+                self._last_request = index
+            else:
+                self.reanchors += 1
+            self.misses = 0
+            self._tracker = tracker
+            self._template = template
+            self.box = tuple(float(v) for v in ltrb)
+            self.score = 1.0
+
+    def update(self, frame):
+        """逐帧更新，返回目标框 (x1, y1, x2, y2)，本帧跟踪失败时返回 None"""
+        tracker, previous = self._tracker, self.box
+        if tracker is None or previous is None:
+            return None
+        ok, (x, y, w, h) = tracker.update(frame)
+        if not ok:
+            with self._state_lock:
+                self.score = 0.0
+            return None
+        box = (float(x), float(y), float(x + w), float(y + h))
+        score = float(cv2.matchTemplate(_patch(_gray(frame), box, self.template_size),
+                                        self._template, cv2.TM_CCOEFF_NORMED)[0, 0])
+        with self._state_lock:
+            if self._tracker is not tracker:
+                return None  # 期间已停止或重新锁定
+            self.score = score
+            self.velocity = ((box[0] + box[2] - previous[0] - previous[2]) / 2,
+                             (box[1] + box[3] - previous[1] - previous[3]) / 2)
+            self.box = box
+        return box
+
+    def wants_detection(self, index):
+        """
+        检测级调用：本帧是否需要运行检测器来校验锁定框。
+
+        Returns:
+            bool | None: 未锁定时返回 None，由调用方按常规节奏检测。
+        """
+        with self._state_lock:
+            if self.box is None:
+                return None
+            since = index - self._last_request if self._last_request is not None else self.verify_every
+            doubtful = self.score is not None and np.isfinite(self.score) and self.score < self.min_score
+            if since >= self.verify_every or (doubtful and since >= self.retry_interval):
+                self._last_request = index
+                return True
+            return False
+
+    def reanchor(self, frame, ltrb):
+        """检测找到了目标：用检测框重新初始化跟踪器"""
+        self._anchor(frame, ltrb)
+
+    def miss(self):
+        """检测没有找到目标，超过 max_misses 次时停止锁定并返回 False"""
+        with self._state_lock:
+            self.misses += 1
+            lost = self.misses > self.max_misses
+        if lost:
+            self.stop()
+            return False
+        return True
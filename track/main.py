@@ -4,8 +4,10 @@ from main_window import MainWindow
 
 if __name__ == "__main__":
     RTSP_URL = "rtsp://192.168.144.25:8554/main.264"
-    SERIAL_PORT = "COM15"
-    MODEL_PATH = "yolov8n-face.pt"
+    # 串口名，或 udp://192.168.144.25:37260 走网口控制
+    SERIAL_PORT = sys.argv[1] if len(sys.argv) > 1 else "COM15"
+    # 可换成 quantize_model.py 生成的 yolov8n-face_int8.onnx
+    MODEL_PATH = sys.argv[2] if len(sys.argv) > 2 else "yolov8n-face.pt"
 
     app = QApplication(sys.argv)
     window = MainWindow(MODEL_PATH, RTSP_URL, SERIAL_PORT)
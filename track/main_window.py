@@ -1,6 +1,6 @@
 import cv2
-from PyQt5.QtCore import Qt, QTimer, pyqtSlot
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import Qt, QEvent, pyqtSlot
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QLabel, QPushButton,
                              QVBoxLayout, QHBoxLayout, QGridLayout,
                              QSizePolicy, QFrame)
@@ -35,6 +35,7 @@ class MainWindow(QMainWindow):
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_label.mousePressEvent = self.get_pixel_position
+        self.video_label.installEventFilter(self)  # 监听显示区域尺寸变化
         video_layout.addWidget(self.video_label)
         main_layout.addWidget(video_frame, 3)
 
@@ -141,11 +142,6 @@ class MainWindow(QMainWindow):
         self.btn_start_track.setEnabled(False)
         self.btn_stop_track.setEnabled(False)
 
-        # 移动定时器
-        self.move_timer = QTimer()
-        self.move_timer.setInterval(100)
-        self.current_direction = None
-
         self.video_thread.start()
 
     def create_control_button(self, text, btn_type):
@@ -174,34 +170,24 @@ class MainWindow(QMainWindow):
         return btn
 
     def start_move(self, direction):
-        self.current_direction = direction
-        self.move_timer.timeout.connect(self.handle_movement)
-        self.move_timer.start()
+        self.video_thread.start_nudge(direction)
 
     def stop_move(self):
-        self.move_timer.stop()
-        self.move_timer.timeout.disconnect()
-
-    def handle_movement(self):
-        step = self.video_thread.step_size
-        if self.current_direction == 'up':
-            self.video_thread.move_gimbal(0, step)
-        elif self.current_direction == 'down':
-            self.video_thread.move_gimbal(0, -step)
-        elif self.current_direction == 'left':
-            self.video_thread.move_gimbal(-step, 0)
-        elif self.current_direction == 'right':
-            self.video_thread.move_gimbal(step, 0)
-
-    @pyqtSlot(QImage)
-    def update_image(self, image):
-        pixmap = QPixmap.fromImage(image)
-        scaled_pixmap = pixmap.scaled(
-            self.video_label.size(),
-            Qt.KeepAspectRatioByExpanding,
-            Qt.SmoothTransformation
-        )
-        self.video_label.setPixmap(scaled_pixmap)
+        self.video_thread.stop_nudge()
+
+    @pyqtSlot(object)
+    def update_image(self, frame):
+        # 画面已在处理线程中缩放到显示尺寸，这里只做一次 QPixmap 转换后归还缓冲区
+        pixmap = QPixmap.fromImage(frame.image)
+        frame.release()
+        self.video_label.setPixmap(pixmap)
+
+    def eventFilter(self, obj, event):
+        if obj is self.video_label and event.type() == QEvent.Resize:
+            size = event.size()
+            self.video_thread.set_view_size(size.width(), size.height())
+        # 不拦截事件，QLabel 仍按自身逻辑处理尺寸变化
+        return super().eventFilter(obj, event)
 
     @pyqtSlot(str)
     def update_target_info(self, info):
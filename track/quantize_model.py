@@ -0,0 +1,217 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import time
+import cv2
+import numpy as np
+from bench_inference import load_frames, run_size
+from bench_stats import summarize
+from box_ops import box_iou, greedy_match
+from inference_backend import export_model, load_detector
+from inference_preprocess import Letterbox
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+# 检测头中对量化敏感的逐元素运算（框解码、DFL），保持浮点
+HEAD_FLOAT_OPS = {'onnx': ('Mul', 'Sub', 'Add', 'Div', 'Sigmoid', 'Softmax'),
+                  'openvino': ('Multiply', 'Subtract', 'Add', 'Divide', 'Sigmoid', 'SoftMax')}
+
+
+# ============================== 标定数据 ==============================
+def load_calibration_frames(source, count=300):
+    """读取标定/评估画面：图片文件夹（可含录像文件）或单个录像文件"""
+    if os.path.isfile(source):
+        return load_frames(source, count)
+    frames = []
+    for path in sorted(glob.glob(os.path.join(source, '*'))):
+        if len(frames) >= count:
+            break
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(path)
+            if image is not None:
+                frames.append(image)
+        elif os.path.isfile(path):
+            frames.extend(load_frames(path, count - len(frames)))
+    return frames
+
+
+def to_tensor(frame, letterbox, imgsz):
+    """与 ultralytics 前处理一致：letterbox → BGR 转 RGB → CHW → 归一化到 [0, 1]"""
+    image, _ = letterbox(frame, imgsz)
+    return (image[:, :, ::-1].transpose(2, 0, 1)[np.newaxis] / 255.0).astype(np.float32)
+
+
+def quantized_path(model_path, fmt):
+    stem, _ = os.path.splitext(model_path)
+    return stem + ('_int8.onnx' if fmt == 'onnx' else '_int8_openvino_model')
+
+
+# ============================== 量化 ==============================
+def quantize_onnx(fp32_path, output, frames, imgsz):
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+
+    model = onnx.load(fp32_path)
+    input_name = model.graph.input[0].name
+    head = _head_prefix(n.name for n in model.graph.node)
+    exclude = [n.name for n in model.graph.node
+               if head and n.name.startswith(head) and n.op_type in HEAD_FLOAT_OPS['onnx']]
+    letterbox = Letterbox((imgsz,))
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self._frames, None)
+            return None if frame is None else {input_name: to_tensor(frame, letterbox, imgsz)}
+
+    quantize_static(fp32_path, output, FrameReader(), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    per_channel=True, calibrate_method=CalibrationMethod.MinMax,
+                    nodes_to_exclude=exclude)
+
+    # 保留导出时写入的类别名、步长等元数据，ultralytics 加载时需要
+    quantized = onnx.load(output)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(model.metadata_props)
+    onnx.save(quantized, output)
+    return len(exclude)
+
+
+def quantize_openvino(fp32_dir, output, frames, imgsz):
+    import nncf
+    import openvino as ov
+
+    xml = next(iter(glob.glob(os.path.join(fp32_dir, '*.xml'))))
+    model = ov.Core().read_model(xml)
+    letterbox = Letterbox((imgsz,))
+    dataset = nncf.Dataset(frames, lambda frame: to_tensor(frame, letterbox, imgsz))
+    head = _head_prefix(op.get_friendly_name() for op in model.get_ops())
+    ignored = nncf.IgnoredScope(
+        names=[op.get_friendly_name() for op in model.get_ops()
+               if head and op.get_friendly_name().startswith(head)
+               and op.get_type_name() in HEAD_FLOAT_OPS['openvino']],
+        validate=False)
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED,
+                              subset_size=len(frames), ignored_scope=ignored)
+    os.makedirs(output, exist_ok=True)
+    ov.save_model(quantized, os.path.join(output, os.path.basename(xml)))
+    metadata = os.path.join(fp32_dir, 'metadata.yaml')
+    if os.path.exists(metadata):
+        shutil.copy(metadata, output)
+    return len(ignored.names)
+
+
+def _head_prefix(names):
+    """检测头（编号最大的顶层模块）的节点名前缀，如 '/model.22/'"""
+    indices = [int(m.group(1)) for m in (re.search(r'/model\.(\d+)/', n) for n in names) if m]
+    return f"/model.{max(indices)}/" if indices else None
+
+
+def quantize(model_path, calibration, fmt='onnx', imgsz=640, count=300, output=None):
+    frames = load_calibration_frames(calibration, count)
+    if not frames:
+        raise ValueError(f"{calibration} 中没有可用的标定画面")
+    fp32 = export_model(model_path, fmt, imgsz)
+    output = output or quantized_path(model_path, fmt)
+    print(f"[量化] {fp32} → {output}，标定画面 {len(frames)} 帧")
+    quantize_fn = quantize_onnx if fmt == 'onnx' else quantize_openvino
+    kept_float = quantize_fn(fp32, output, frames, imgsz)
+    print(f"[量化] 完成，检测头中 {kept_float} 个节点保持浮点")
+    return output
+
+
+# ============================== 评估 ==============================
+def agreement(reference, candidate, iou_threshold=0.5):
+    """以 fp32 结果为基准，统计量化模型检测结果的一致程度"""
+    matched = ref_total = cand_total = 0
+    ious = []
+    for ref, cand in zip(reference, candidate):
+        ref_total += len(ref)
+        cand_total += len(cand)
+        if len(ref) and len(cand):
+            iou = box_iou(ref, cand)
+            pairs = greedy_match(iou, iou_threshold)
+            matched += len(pairs)
+            ious.extend(float(iou[r, c]) for r, c in pairs)
+    recall = matched / ref_total if ref_total else None
+    precision = matched / cand_total if cand_total else None
+    f1 = (2 * recall * precision / (recall + precision)
+          if recall is not None and precision is not None and recall + precision > 0 else None)
+    return {'recall': recall, 'precision': precision, 'f1': f1,
+            'mean_iou': float(np.mean(ious)) if ious else None,
+            'reference_detections': ref_total, 'candidate_detections': cand_total}
+
+
+def evaluate(fp32_path, int8_path, source, imgsz=640, count=300, conf=0.25, iou=0.5,
+             threads=None, fp32_backend='auto'):
+    frames = load_calibration_frames(source, count)
+    if not frames:
+        raise ValueError(f"{source} 中没有可用的评估画面")
+    report = {}
+    boxes = {}
+    for name, path, backend in (('fp32', fp32_path, fp32_backend), ('int8', int8_path, 'auto')):
+        model = load_detector(path, device='cpu', backend=backend, threads=threads, imgsz=imgsz)
+        boxes[name], times = run_size(model, frames, imgsz, conf)
+        report[name] = {'model': path, 'latency_ms': summarize(times),
+                        'fps': 1000.0 / (sum(times) / len(times))}
+    report['speedup'] = report['fp32']['latency_ms']['mean'] / report['int8']['latency_ms']['mean']
+    report['agreement'] = agreement(boxes['fp32'], boxes['int8'], iou)
+    report['frames'] = len(frames)
+    return report
+
+
+# ============================== 主程序 ==============================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="检测模型 INT8 训练后量化与评估")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    q = sub.add_parser('quantize', help="用录制的画面标定并生成 INT8 模型")
+    q.add_argument('calibration', help="标定画面文件夹或录像文件")
+    q.add_argument('--model', default="yolov8n-face.pt", help="fp32 模型")
+    q.add_argument('--format', default='onnx', choices=['onnx', 'openvino'], help="量化后模型格式")
+    q.add_argument('--imgsz', type=int, default=640, help="标定使用的输入尺寸")
+    q.add_argument('--count', type=int, default=300, help="最多使用的标定帧数")
+    q.add_argument('--output', default=None, help="输出路径，缺省在模型旁生成 *_int8")
+
+    e = sub.add_parser('eval', help="比较 fp32 与 INT8 模型的延迟、吞吐量与检测一致性")
+    e.add_argument('source', help="评估画面文件夹或录像文件")
+    e.add_argument('--model', default="yolov8n-face.pt", help="fp32 模型")
+    e.add_argument('--int8', default=None, help="INT8 模型，缺省为 quantize 的默认输出")
+    e.add_argument('--format', default='onnx', choices=['onnx', 'openvino'],
+                   help="未指定 --int8 时按该格式查找默认输出，fp32 也用同一运行时对比")
+    e.add_argument('--imgsz', type=int, default=640, help="推理尺寸")
+    e.add_argument('--count', type=int, default=300, help="最多使用的帧数")
+    e.add_argument('--conf', type=float, default=0.25, help="置信度阈值")
+    e.add_argument('--iou', type=float, default=0.5, help="判定为同一目标的IoU阈值")
+    e.add_argument('--threads', type=int, default=None, help="CPU 推理线程数")
+    e.add_argument('--output', default=None, help="结果JSON文件，缺省输出到标准输出")
+    args = parser.parse_args()
+
+    if args.command == 'quantize':
+        quantize(args.model, args.calibration, args.format, args.imgsz, args.count, args.output)
+        sys.exit(0)
+
+    report = evaluate(args.model, args.int8 or quantized_path(args.model, args.format), args.source,
+                      args.imgsz, args.count, args.conf, args.iou, args.threads, fp32_backend=args.format)
+    report['meta'] = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'source': args.source,
+        'imgsz': args.imgsz,
+        'threads': args.threads,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已写入 {args.output}")
+    else:
+        print(text)
@@ -0,0 +1,96 @@
+import math
+
+
+def _round_up(value, stride):
+    return int(math.ceil(value / stride) * stride)
+
+
+# ============================== 目标区域检测 ==============================
+class RoiPlanner:
+    def __init__(self, scale=2.5, sigma_gain=3.0, expand_factor=1.6, max_expansions=3,
+                 full_frame_every=10, min_size=192, max_imgsz=640, stride=32):
+        """
+        锁定目标后只在其预测位置附近的搜索窗口内运行检测器。
+
+        窗口以预测框中心为中心，边长为框尺寸的 scale 倍，再加上两次检测之间
+        目标可能的位移（速度 × 间隔帧数）和 sigma_gain 倍的位置标准差。
+        窗口内未检出目标时逐级放大 expand_factor 倍，连续 max_expansions 次
+        仍未找回则改为全画面检测；即使一直找得到，每 full_frame_every 次检测
+        也做一次全画面检测，以便发现新目标、保持其他轨迹。窗口外的轨迹每次窗口
+        检测都计为未匹配，因此该周期须明显短于跟踪器的 max_age，否则轨迹会在
+        全画面检测刷新之前被删除。
+
+        Args:
+            scale (float): 窗口相对目标框的基础倍数。
+            sigma_gain (float): 位置标准差的倍数。
+            expand_factor (float): 每次未检出时窗口的放大倍数。
+            max_expansions (int): 放大次数上限，超过后做全画面检测。
+            full_frame_every (int): 全画面检测的周期（检测次数），应明显小于跟踪器的 max_age。
+            min_size (int): 窗口最小边长（像素）。
+            max_imgsz (int): 推理尺寸上限，与模型的默认输入尺寸一致。
+            stride (int): 推理尺寸需为网络步长的整数倍。
+        """
+        self.scale = scale
+        self.sigma_gain = sigma_gain
+        self.expand_factor = expand_factor
+        self.max_expansions = max_expansions
+        self.full_frame_every = full_frame_every
+        self.min_size = min_size
+        self.max_imgsz = max_imgsz
+        self.stride = stride
+        self.reset()
+
+    def reset(self):
+        self.misses = 0
+        self._since_full = 0
+        self.roi_passes = 0
+        self.full_passes = 0
+
+    def plan(self, frame_size, hint, index):
+        """
+        返回本次检测的搜索窗口 (x1, y1, x2, y2)，需要全画面检测时返回 None。
+
+        Args:
+            frame_size (tuple): 画面尺寸 (宽, 高)。
+            hint (tuple): 跟踪级发布的目标状态 (帧序号, (x1, y1, x2, y2), (vx, vy), 位置标准差)，
+                速度单位为像素/帧；没有锁定目标时为 None。
+            index (int): 当前帧序号。
+        """
+        if (hint is None or self.misses >= self.max_expansions
+                or self._since_full >= self.full_frame_every):
+            self._since_full = 0
+            self.full_passes += 1
+            return None
+
+        hint_index, (x1, y1, x2, y2), (vx, vy), std = hint
+        lag = max(index - hint_index, 0)
+        cx = (x1 + x2) / 2 + vx * lag
+        cy = (y1 + y2) / 2 + vy * lag
+        margin = 2 * self.sigma_gain * (std if math.isfinite(std) else 0.0)
+        growth = self.expand_factor ** self.misses
+        w = ((x2 - x1) * self.scale + 2 * abs(vx) * lag + margin) * growth
+        h = ((y2 - y1) * self.scale + 2 * abs(vy) * lag + margin) * growth
+        width, height = frame_size
+        w = min(max(w, self.min_size), width)
+        h = min(max(h, self.min_size), height)
+        if w * h >= 0.5 * width * height:
+            # 窗口已接近全画面，直接做全画面检测
+            self._since_full = 0
+            self.full_passes += 1
+            return None
+
+        rx1 = int(min(max(cx - w / 2, 0), width - w))
+        ry1 = int(min(max(cy - h / 2, 0), height - h))
+        self._since_full += 1
+        self.roi_passes += 1
+        return rx1, ry1, rx1 + int(w), ry1 + int(h)
+
+    def imgsz(self, roi):
+        """窗口对应的推理尺寸：按长边取步长整数倍，不超过 max_imgsz"""
+        side = max(roi[2] - roi[0], roi[3] - roi[1])
+        return min(_round_up(side, self.stride), self.max_imgsz)
+
+    def report(self, found):
+        """检测帧上是否找到了锁定目标，用于决定下一次窗口是否放大"""
+        self.misses = 0 if found else self.misses + 1
+
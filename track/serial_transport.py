@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from siyi_protocol import FrameDecoder
+
+
+# ============================== 流水线串口传输层 ==============================
+class SerialTransport:
+    def __init__(self, ser, default_timeout=1.0, poll_interval=0.01, echo_seq=True):
+        """
+        基于 serial.Serial 的请求/应答传输层。
+
+        每帧发送时写入递增的 SEQ，允许多个请求同时在途；后台读线程解码应答，
+        按 (CMD_ID, SEQ) 匹配回对应请求。SEQ 为 0 的应答（云台未回显 SEQ）
+        按 CMD_ID 匹配最早发出的请求；SEQ 非 0 却匹配不到的应答多半是已超时
+        请求的迟到应答，不会交给其他请求，与其他未匹配消息一样转发给监听器。
+
+        Args:
+            ser: 已打开的 serial.Serial 对象，传输层接管其读取。
+            default_timeout (float): 默认的单个请求超时时间（秒）。
+            poll_interval (float): 读线程的串口读超时，决定超时检查的粒度。
+            echo_seq (bool): 云台应答是否回显请求的 SEQ。固件应答的 SEQ 与请求
+                无关时设为 False，所有应答都按 CMD_ID 匹配最早的在途请求。
+        """
+        self.ser = ser
+        self.default_timeout = default_timeout
+        self.poll_interval = poll_interval
+        self.echo_seq = echo_seq
+        self.decoder = FrameDecoder()
+        self._pending = OrderedDict()  # (cmd_id, seq) -> (future, deadline, 发送时刻)
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._listeners = []
+        self._seq = 0
+        self._running = False
+        self._reader = None
+        self._error = None  # 读线程退出的原因，此后的请求直接以该异常结束
+        self.timeouts = 0
+        self.rtt = None  # 请求往返时间的指数滑动平均（秒）
+
+    def start(self):
+        """启动后台读线程"""
+        if self._running:
+            return self
+        self.ser.timeout = self.poll_interval
+        self._error = None
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, name="siyi-reader", daemon=True)
+        self._reader.start()
+        return self
+
+    def close(self):
+        """停止读线程，未完成的请求以超时结束，之后的请求直接失败"""
+        self._running = False
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join()
+        self._reader = None
+        self._expire(float('inf'))
+        with self._pending_lock:
+            if self._error is None:
+                self._error = ConnectionError("传输层已关闭")
+
+    def add_listener(self, callback):
+        """注册未匹配消息（如云台主动推送的数据）的回调，回调在读线程中执行"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self._listeners.remove(callback)
+
+    def _next_seq(self):
+        self._seq = self._seq % 0xFFFF + 1  # 1~0xFFFF 循环，0 留给旧式调用
+        return self._seq
+
+    def send(self, template, *values):
+        """发送一帧（不等待应答），返回使用的 SEQ"""
+        with self._write_lock:
+            seq = self._next_seq()
+            self.ser.write(template.encode(*values, seq=seq))
+        return seq
+
+    def request(self, template, *values, timeout=None, callback=None):
+        """
+        发送一帧并返回等待应答的 Future。
+
+        Args:
+            template (CommandTemplate): 命令模板。
+            *values: 命令数据字段。
+            timeout (float): 本请求的超时时间，默认使用 default_timeout。
+            callback (callable): 完成时以 Future 为参数回调。
+
+        Returns:
+            Future: 结果为解码后的应答消息，超时则抛出 TimeoutError；
+                读线程已退出时以其异常结束。
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        error = None
+        with self._write_lock:
+            seq = self._next_seq()
+            now = time.monotonic()
+            deadline = now + (self.default_timeout if timeout is None else timeout)
+            with self._pending_lock:
+                error = self._error
+                if error is None:
+                    self._pending[(template.cmd_id, seq)] = (future, deadline, now)
+            if error is None:
+                try:
+                    self.ser.write(template.encode(*values, seq=seq))
+                except Exception as e:
+                    with self._pending_lock:
+                        self._pending.pop((template.cmd_id, seq), None)
+                    error = e
+        # 在锁外完成 Future，避免回调中再次发送请求时死锁
+        if error is not None:
+            future.set_exception(error)
+        return future
+
+    def _read_loop(self):
+        while self._running:
+            try:
+                messages = self.decoder.read(self.ser)
+            except Exception as e:
+                print(f"[串口读取错误] {e}")
+                self._running = False
+                self._fail_all(e)
+                break
+            for msg in messages:
+                self._dispatch(msg)
+            self._expire(time.monotonic())
+
+    def _dispatch(self, msg):
+        with self._pending_lock:
+            entry = self._pending.pop((msg.cmd_id, msg.seq), None) if self.echo_seq else None
+            if entry is None and (msg.seq == 0 or not self.echo_seq):
+                # 应答未回显 SEQ 时，按 CMD_ID 匹配最早的在途请求
+                for key in self._pending:
+                    if key[0] == msg.cmd_id:
+                        entry = self._pending.pop(key)
+                        break
+        if entry is not None:
+            future, _, sent = entry
+            rtt = time.monotonic() - sent
+            self.rtt = rtt if self.rtt is None else 0.9 * self.rtt + 0.1 * rtt
+            if not future.done():
+                future.set_result(msg)
+            return
+        for listener in list(self._listeners):
+            listener(msg)
+
+    def _expire(self, now):
+        expired = []
+        with self._pending_lock:
+            for key, (future, deadline, _) in list(self._pending.items()):
+                if deadline <= now:
+                    expired.append((key, future))
+                    del self._pending[key]
+        for (cmd_id, seq), future in expired:
+            self.timeouts += 1
+            if not future.done():
+                future.set_exception(TimeoutError(f"请求超时: CMD_ID=0x{cmd_id:02X}, SEQ={seq}"))
+
+    def _fail_all(self, error):
+        """读线程退出：在途请求全部以 error 结束，之后的请求不再受理"""
+        with self._pending_lock:
+            self._error = error
+            failed = [future for future, _, _ in self._pending.values()]
+            self._pending.clear()
+        for future in failed:
+            if not future.done():
+                future.set_exception(error)
+
+    @property
+    def in_flight(self):
+        """当前在途的请求数"""
+        return len(self._pending)
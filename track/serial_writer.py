@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+from siyi_protocol import ANGLE_COMMAND, ROTATION_COMMAND, CENTER_COMMAND
+from gimbal_control import check_angle_range
+
+
+# ============================== 串口发送线程 ==============================
+class SerialWriter(threading.Thread):
+    def __init__(self, transport, max_rate=20.0):
+        """
+        独占串口写入的发送线程。
+
+        角度/速度设定值只保留最新的一个（新值覆盖尚未发出的旧值），
+        回中、停止等紧急指令进入优先队列，先于设定值发出。
+        所有输出按 max_rate 限速，云台始终执行最新的设定值而不是积压的旧指令。
+
+        Args:
+            transport (SerialTransport): 负责 SEQ 编号与实际写串口的传输层。
+            max_rate (float): 最大发送帧率（帧/秒）。
+        """
+        super().__init__(name="siyi-writer", daemon=True)
+        self.transport = transport
+        self.interval = 1.0 / max_rate
+        self._cond = threading.Condition()
+        self._urgent = deque()  # 紧急指令 (template, values)
+        self._setpoint = None  # 最新设定值 (template, values)
+        self._running = True
+        self._next_time = 0.0
+        self.sent = 0
+        self.coalesced = 0  # 被新设定值覆盖而未发送的帧数
+
+    def set_angle(self, yaw, pitch):
+        """更新角度设定值（单位°），覆盖尚未发送的旧设定值"""
+        check_angle_range(yaw, pitch)
+        self._post_setpoint(ANGLE_COMMAND, (int(yaw * 10), int(pitch * 10)))
+
+    def set_speed(self, yaw_speed, pitch_speed):
+        """更新转动速度设定值（-100~100），覆盖尚未发送的旧设定值"""
+        yaw_speed = max(min(int(yaw_speed), 100), -100)
+        pitch_speed = max(min(int(pitch_speed), 100), -100)
+        self._post_setpoint(ROTATION_COMMAND, (yaw_speed, pitch_speed))
+
+    def home(self):
+        """一键回中，插队发送并丢弃未发送的设定值"""
+        self._post_urgent(CENTER_COMMAND, (1,))
+
+    def halt(self):
+        """停止转动，插队发送并丢弃未发送的设定值"""
+        self._post_urgent(ROTATION_COMMAND, (0, 0))
+
+    def _post_setpoint(self, template, values):
+        with self._cond:
+            if self._setpoint is not None:
+                self.coalesced += 1
+            self._setpoint = (template, values)
+            self._cond.notify()
+
+    def _post_urgent(self, template, values):
+        with self._cond:
+            if self._setpoint is not None:
+                self.coalesced += 1
+                self._setpoint = None
+            self._urgent.append((template, values))
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._urgent and self._setpoint is None:
+                    self._cond.wait()
+                if not self._running:
+                    break
+                delay = self._next_time - time.monotonic()
+                if delay > 0:
+                    # 等待发送时隙，期间到达的新设定值会覆盖旧值
+                    self._cond.wait(delay)
+                    continue
+                if self._urgent:
+                    template, values = self._urgent.popleft()
+                else:
+                    template, values = self._setpoint
+                    self._setpoint = None
+
+            try:
+                self.transport.send(template, *values)
+                self.sent += 1
+            except Exception as e:
+                print(f"[串口写入错误] {e}")
+            self._next_time = time.monotonic() + self.interval
+
+    def close(self):
+        """停止发送线程，未发送的指令被丢弃"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,315 @@
+import struct
+import time
+from collections import namedtuple
+
+# ============================== CRC16 校验 ==============================
+crc16_tab = [
+    0x0000, 0x1021, 0x2042, 0x3063, 0x4084, 0x50A5, 0x60C6, 0x70E7,
+    0x8108, 0x9129, 0xA14A, 0xB16B, 0xC18C, 0xD1AD, 0xE1CE, 0xF1EF,
+    0x1231, 0x0210, 0x3273, 0x2252, 0x52B5, 0x4294, 0x72F7, 0x62D6,
+    0x9339, 0x8318, 0xB37B, 0xA35A, 0xD3BD, 0xC39C, 0xF3FF, 0xE3DE,
+    0x2462, 0x3443, 0x0420, 0x1401, 0x64E6, 0x74C7, 0x44A4, 0x5485,
+    0xA56A, 0xB54B, 0x8528, 0x9509, 0xE5EE, 0xF5CF, 0xC5AC, 0xD58D,
+    0x3653, 0x2672, 0x1611, 0x0630, 0x76D7, 0x66F6, 0x5695, 0x46B4,
+    0xB75B, 0xA77A, 0x9719, 0x8738, 0xF7DF, 0xE7FE, 0xD79D, 0xC7BC,
+    0x48C4, 0x58E5, 0x6886, 0x78A7, 0x0840, 0x1861, 0x2802, 0x3823,
+    0xC9CC, 0xD9ED, 0xE98E, 0xF9AF, 0x8948, 0x9969, 0xA90A, 0xB92B,
+    0x5AF5, 0x4AD4, 0x7AB7, 0x6A96, 0x1A71, 0x0A50, 0x3A33, 0x2A12,
+    0xDBFD, 0xCBDC, 0xFBBF, 0xEB9E, 0x9B79, 0x8B58, 0xBB3B, 0xAB1A,
+    0x6CA6, 0x7C87, 0x4CE4, 0x5CC5, 0x2C22, 0x3C03, 0x0C60, 0x1C41,
+    0xEDAE, 0xFD8F, 0xCDEC, 0xDDCD, 0xAD2A, 0xBD0B, 0x8D68, 0x9D49,
+    0x7E97, 0x6EB6, 0x5ED5, 0x4EF4, 0x3E13, 0x2E32, 0x1E51, 0x0E70,
+    0xFF9F, 0xEFBE, 0xDFDD, 0xCFFC, 0xBF1B, 0xAF3A, 0x9F59, 0x8F78,
+    0x9188, 0x81A9, 0xB1CA, 0xA1EB, 0xD10C, 0xC12D, 0xF14E, 0xE16F,
+    0x1080, 0x00A1, 0x30C2, 0x20E3, 0x5004, 0x4025, 0x7046, 0x6067,
+    0x83B9, 0x9398, 0xA3FB, 0xB3DA, 0xC33D, 0xD31C, 0xE37F, 0xF35E,
+    0x02B1, 0x1290, 0x22F3, 0x32D2, 0x4235, 0x5214, 0x6277, 0x7256,
+    0xB5EA, 0xA5CB, 0x95A8, 0x8589, 0xF56E, 0xE54F, 0xD52C, 0xC50D,
+    0x34E2, 0x24C3, 0x14A0, 0x0481, 0x7466, 0x6447, 0x5424, 0x4405,
+    0xA7DB, 0xB7FA, 0x8799, 0x97B8, 0xE75F, 0xF77E, 0xC71D, 0xD73C,
+    0x26D3, 0x36F2, 0x0691, 0x16B0, 0x6657, 0x7676, 0x4615, 0x5634,
+    0xD94C, 0xC96D, 0xF90E, 0xE92F, 0x99C8, 0x89E9, 0xB98A, 0xA9AB,
+    0x5844, 0x4865, 0x7806, 0x6827, 0x18C0, 0x08E1, 0x3882, 0x28A3,
+    0xCB7D, 0xDB5C, 0xEB3F, 0xFB1E, 0x8BF9, 0x9BD8, 0xABBB, 0xBB9A,
+    0x4A75, 0x5A54, 0x6A37, 0x7A16, 0x0AF1, 0x1AD0, 0x2AB3, 0x3A92,
+    0xFD2E, 0xED0F, 0xDD6C, 0xCD4D, 0xBDAA, 0xAD8B, 0x9DE8, 0x8DC9,
+    0x7C26, 0x6C07, 0x5C64, 0x4C45, 0x3CA2, 0x2C83, 0x1CE0, 0x0CC1,
+    0xEF1F, 0xFF3E, 0xCF5D, 0xDF7C, 0xAF9B, 0xBFBA, 0x8FD9, 0x9FF8,
+    0x6E17, 0x7E36, 0x4E55, 0x5E74, 0x2E93, 0x3EB2, 0x0ED1, 0x1EF0
+]
+
+
+def crc16_cal(data, crc=0):
+    """计算CRC16校验值，crc 为初始值（可传入已缓存的前缀校验值继续计算）"""
+    for byte in data:
+        temp = (crc >> 8) & 0xFF
+        crc = ((crc << 8) & 0xFFFF) ^ crc16_tab[(byte ^ temp) & 0xFF]
+    return crc
+
+
+# ============================== SIYI 协议常量 ==============================
+STX = b'\x55\x66'
+HEADER_LEN = 8  # STX(2) + CTRL(1) + Data_len(2) + SEQ(2) + CMD_ID(1)
+CRC_LEN = 2
+MAX_DATA_LEN = 256  # 超过该长度视为误判的STX，用于快速重同步
+
+CMD_ROTATION = 0x07  # 云台转向（速度模式）
+CMD_CENTER = 0x08  # 一键回中
+CMD_ATTITUDE = 0x0D  # 获取云台姿态
+CMD_SET_ANGLE = 0x0E  # 设置云台控制角度
+CMD_DATA_STREAM = 0x25  # 请求云台按固定频率推送数据
+
+STREAM_ATTITUDE = 1  # 0x25 数据类型：姿态
+# 0x25 推送频率档位：编码 -> Hz（0 为关闭）
+STREAM_FREQS = {0: 0, 1: 2, 2: 4, 3: 5, 4: 10, 5: 20, 6: 50, 7: 100}
+
+
+# ============================== 俯仰角换算 ==============================
+def pitch_from_device(pitch, rate=0.0):
+    """
+    0x0D 姿态中上报的俯仰角 → 角度指令（0x0E）所用的俯仰角，角速度同步换算。
+
+    上报值 ≤ -9° 时取反，否则减去 180°，与原姿态解析的换算一致。
+
+    Returns:
+        tuple: (俯仰角°, 俯仰角速度°/s)
+    """
+    if pitch <= -9.0:
+        return -pitch, -rate
+    return pitch - 180, rate
+
+
+def pitch_to_device(pitch, rate=0.0):
+    """pitch_from_device 的逆换算：指令坐标下的俯仰角 → 云台上报的值"""
+    if pitch >= 9.0:
+        return -pitch, -rate
+    return pitch + 180, rate
+
+
+# ============================== 消息类型 ==============================
+class Attitude(namedtuple('Attitude', 'seq yaw pitch roll yaw_vel pitch_vel roll_vel')):
+    """0x0D 姿态数据：角度单位°，角速度单位°/s"""
+    __slots__ = ()
+    cmd_id = CMD_ATTITUDE
+
+
+class AngleReply(namedtuple('AngleReply', 'seq yaw pitch roll')):
+    """0x0E 角度控制应答：云台当前角度"""
+    __slots__ = ()
+    cmd_id = CMD_SET_ANGLE
+
+
+StatusReply = namedtuple('StatusReply', 'seq cmd_id status')  # 0x07/0x08/0x25 等状态应答
+RawFrame = namedtuple('RawFrame', 'seq cmd_id ctrl data')  # 未定义解析方式的帧
+
+_ATTITUDE_STRUCT = struct.Struct('<6h')
+_ANGLE_STRUCT = struct.Struct('<3h')
+
+
+def _parse_attitude(seq, data):
+    yaw, pitch, roll, yaw_vel, pitch_vel, roll_vel = _ATTITUDE_STRUCT.unpack_from(data)
+    return Attitude(seq, yaw / 10.0, pitch / 10.0, roll / 10.0,
+                    yaw_vel / 10.0, pitch_vel / 10.0, roll_vel / 10.0)
+
+
+def _parse_angle(seq, data):
+    yaw, pitch, roll = _ANGLE_STRUCT.unpack_from(data)
+    return AngleReply(seq, yaw / 10.0, pitch / 10.0, roll / 10.0)
+
+
+# CMD_ID -> (最小数据长度, 解析函数)
+_PARSERS = {
+    CMD_ATTITUDE: (_ATTITUDE_STRUCT.size, _parse_attitude),
+    CMD_SET_ANGLE: (_ANGLE_STRUCT.size, _parse_angle),
+    CMD_ROTATION: (1, lambda seq, data: StatusReply(seq, CMD_ROTATION, data[0])),
+    CMD_CENTER: (1, lambda seq, data: StatusReply(seq, CMD_CENTER, data[0])),
+    CMD_DATA_STREAM: (1, lambda seq, data: StatusReply(seq, CMD_DATA_STREAM, data[0])),
+}
+
+
+# ============================== 流式解码器 ==============================
+class FrameDecoder:
+    def __init__(self, capacity=4096, max_data_len=MAX_DATA_LEN, parse=True):
+        """
+        SIYI 协议流式解码器。
+
+        串口收到的字节按块写入内部缓冲区，解码器从中切分出所有完整的
+        0x55 0x66 帧（任意 Data_len 与 CMD_ID），校验 CRC16 后返回类型化消息。
+        遇到错位、截断或校验失败的数据时，跳过一个字节重新寻找 STX。
+
+        Args:
+            capacity (int): 缓冲区最多保留的未解析字节数，超出时丢弃最旧的数据。
+            max_data_len (int): 允许的最大 Data_len，超出视为误判的帧头。
+            parse (bool): 为 False 时不按 CMD_ID 解析，全部返回 RawFrame（用于解码发往云台的指令）。
+        """
+        self.capacity = capacity
+        self.max_data_len = max_data_len
+        self.parse = parse
+        self._buf = bytearray()
+        self._pos = 0  # 缓冲区中下一个未解析字节的位置
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped_bytes = 0
+
+    def reset(self):
+        """清空缓冲区中残留的数据"""
+        self._buf.clear()
+        self._pos = 0
+
+    def feed(self, data):
+        """写入新收到的字节，返回其中解出的全部消息"""
+        buf = self._buf
+        # 已解析的部分超过一半时整体前移，避免缓冲区无限增长
+        if self._pos and self._pos * 2 >= len(buf):
+            del buf[:self._pos]
+            self._pos = 0
+        buf += data
+
+        pos = self._pos
+        overflow = len(buf) - pos - self.capacity
+        if overflow > 0:
+            pos += overflow
+            self.dropped_bytes += overflow
+
+        messages = []
+        while True:
+            start = buf.find(STX, pos)
+            if start < 0:
+                # 末尾的 0x55 可能是下一帧 STX 的前半部分，予以保留
+                keep = 1 if len(buf) > pos and buf[-1] == 0x55 else 0
+                self.dropped_bytes += len(buf) - pos - keep
+                pos = len(buf) - keep
+                break
+            self.dropped_bytes += start - pos
+            pos = start
+            if len(buf) - pos < HEADER_LEN:
+                break
+
+            data_len = buf[pos + 3] | (buf[pos + 4] << 8)
+            if data_len > self.max_data_len:
+                pos += 1
+                self.dropped_bytes += 1
+                continue
+            end = pos + HEADER_LEN + data_len + CRC_LEN
+            if len(buf) < end:
+                break
+
+            crc = buf[end - 2] | (buf[end - 1] << 8)
+            if crc16_cal(buf[pos:end - CRC_LEN]) != crc:
+                pos += 1
+                self.crc_errors += 1
+                self.dropped_bytes += 1
+                continue
+
+            messages.append(self._parse(buf, pos, data_len))
+            self.frames += 1
+            pos = end
+
+        self._pos = pos
+        return messages
+
+    def _parse(self, buf, pos, data_len):
+        ctrl = buf[pos + 2]
+        seq = buf[pos + 5] | (buf[pos + 6] << 8)
+        cmd_id = buf[pos + 7]
+        data = bytes(buf[pos + HEADER_LEN:pos + HEADER_LEN + data_len])
+        parser = _PARSERS.get(cmd_id) if self.parse else None
+        if parser is not None and data_len >= parser[0]:
+            return parser[1](seq, data)
+        return RawFrame(seq, cmd_id, ctrl, data)
+
+    def read(self, ser):
+        """
+        从串口读取当前可用的全部字节并解码。
+
+        至少等待一个字节（受 ser.timeout 限制），其余字节按 in_waiting 一次性读出，
+        避免逐字节的系统调用。
+        """
+        chunk = ser.read(max(1, ser.in_waiting))
+        if not chunk:
+            return []
+        return self.feed(chunk)
+
+    def wait_for(self, ser, cmd_id, timeout):
+        """读取串口直到收到指定 CMD_ID 的消息，超时返回 None"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for msg in self.read(ser):
+                if msg.cmd_id == cmd_id:
+                    return msg
+        return None
+
+
+# ============================== 命令编码器 ==============================
+class CommandTemplate:
+    def __init__(self, cmd_id, data_format='', ctrl=0x01):
+        """
+        预编译的命令帧模板。
+
+        帧头与整帧的 struct 格式只在构造时编译一次；CRC 从缓存的帧头校验值
+        继续计算，SEQ 为 0 时帧头校验值直接取缓存，否则只对 SEQ 与 CMD_ID
+        三个字节逐字节累加，数据部分同理。每次编码返回新的 bytes，模板本身
+        不保存可变状态，可被多个线程同时使用。
+
+        Args:
+            cmd_id (int): 命令 CMD_ID。
+            data_format (str): 数据部分的 struct 格式（小端序，不含 '<'）。
+            ctrl (int): CTRL 字段，0x01 表示需要 ACK。
+        """
+        self.cmd_id = cmd_id
+        self._data = struct.Struct('<' + data_format)
+        self.data_len = self._data.size
+        self.frame_len = HEADER_LEN + self.data_len + CRC_LEN
+        self._frame = struct.Struct('<5sHB' + data_format + 'H')
+        # STX+CTRL+Data_len 及其CRC，与 SEQ=0 时完整帧头的CRC缓存
+        self._prefix = struct.pack('<2sBH', STX, ctrl, self.data_len)
+        self._crc_prefix = crc16_cal(self._prefix)
+        self._crc_header = crc16_cal(bytes((0, 0, cmd_id)), self._crc_prefix)
+
+    def encode(self, *values, seq=0):
+        """编码一帧，返回 bytes"""
+        table = crc16_tab
+        if seq:
+            crc = self._crc_prefix
+            for byte in (seq & 0xFF, seq >> 8, self.cmd_id):
+                crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ byte) & 0xFF]
+        else:
+            crc = self._crc_header
+        if self.data_len:
+            for byte in self._data.pack(*values):
+                crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ byte) & 0xFF]
+        return self._frame.pack(self._prefix, seq, self.cmd_id, *values, crc)
+
+    def encode_into(self, buf, offset, *values, seq=0):
+        """把一帧写入 buf[offset:offset + frame_len]，返回写入后的偏移"""
+        end = offset + self.frame_len
+        buf[offset:end] = self.encode(*values, seq=seq)
+        return end
+
+
+ANGLE_COMMAND = CommandTemplate(CMD_SET_ANGLE, 'hh')  # 角度单位0.1度
+ROTATION_COMMAND = CommandTemplate(CMD_ROTATION, 'bb')  # 速度范围-100~100
+CENTER_COMMAND = CommandTemplate(CMD_CENTER, 'B')
+ATTITUDE_REQUEST = CommandTemplate(CMD_ATTITUDE)
+STREAM_REQUEST = CommandTemplate(CMD_DATA_STREAM, 'BB')  # 数据类型, 频率档位
+
+
+def encode_angle(yaw, pitch, seq=0):
+    """编码角度控制指令（单位°）"""
+    return ANGLE_COMMAND.encode(int(yaw * 10), int(pitch * 10), seq=seq)
+
+
+def encode_trajectory(points, seq=0):
+    """
+    把一串 (yaw, pitch) 角度点批量编码到一块连续缓冲区，便于一次 write 发出。
+
+    Args:
+        points (list): [(yaw, pitch), ...]，单位°。
+        seq (int): 第一帧的 SEQ，此后逐帧加一；为 0 时全部帧 SEQ 为 0。
+
+    Returns:
+        bytearray: 所有帧首尾相接的缓冲区。
+    """
+    encode = ANGLE_COMMAND.encode
+    return bytearray(b''.join(encode(int(yaw * 10), int(pitch * 10), seq=(seq + i) & 0xFFFF if seq else 0)
+                              for i, (yaw, pitch) in enumerate(points)))
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+# ============================== 目标运动预测 ==============================
+class TargetPredictor:
+    def __init__(self, model='cv', accel_noise=2000.0, measurement_noise=8.0):
+        """
+        对选中目标的框中心做卡尔曼滤波，并外推到指令生效时刻。
+
+        两轴相互独立且同时观测，共用一个协方差矩阵，状态矩阵每列对应一个轴。
+
+        Args:
+            model (str): 'cv' 匀速模型或 'ca' 匀加速模型。
+            accel_noise (float): 过程噪声强度（cv 为加速度，ca 为加加速度，像素/s² 或 /s³）。
+            measurement_noise (float): 框中心测量噪声标准差（像素）。
+        """
+        if model not in ('cv', 'ca'):
+            raise ValueError(f"未知的运动模型: {model}")
+        self.model = model
+        self.dim = 2 if model == 'cv' else 3
+        self.accel_noise = accel_noise
+        self.measurement_noise = measurement_noise
+        self._H = np.zeros((1, self.dim))
+        self._H[0, 0] = 1.0
+        self.reset()
+
+    def reset(self):
+        self.x = None  # 状态 (dim, 2)：[位置, 速度(, 加速度)] × [x轴, y轴]
+        self.P = None
+        self.t = None
+
+    @property
+    def initialized(self):
+        return self.x is not None
+
+    def _transition(self, dt):
+        F = np.eye(self.dim)
+        F[0, 1] = dt
+        if self.dim == 3:
+            F[0, 2] = dt * dt / 2
+            F[1, 2] = dt
+        return F
+
+    def _process_noise(self, dt):
+        # 离散白噪声模型：G·Gᵀ·q
+        if self.dim == 2:
+            G = np.array([[dt * dt / 2], [dt]])
+        else:
+            G = np.array([[dt ** 3 / 6], [dt * dt / 2], [dt]])
+        return G @ G.T * self.accel_noise ** 2
+
+    def update(self, center, t):
+        """
+        输入帧采集时刻 t 的框中心观测。
+
+        Args:
+            center (tuple): 框中心 (x, y)。
+            t (float): 帧采集时刻（time.monotonic()）。
+        """
+        z = np.asarray(center, dtype=float).reshape(1, 2)
+        if self.x is None:
+            self.x = np.zeros((self.dim, 2))
+            self.x[0] = z
+            self.P = np.diag([self.measurement_noise ** 2] + [1e6] * (self.dim - 1))
+            self.t = t
+            return
+        dt = max(t - self.t, 0.0)
+        if dt > 0:
+            F = self._transition(dt)
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + self._process_noise(dt)
+        S = self._H @ self.P @ self._H.T + self.measurement_noise ** 2
+        K = self.P @ self._H.T / S
+        self.x = self.x + K @ (z - self._H @ self.x)
+        self.P = (np.eye(self.dim) - K @ self._H) @ self.P
+        self.t = t
+
+    def predict(self, t):
+        """外推到时刻 t 的框中心 (x, y)，未初始化时返回 None"""
+        if self.x is None:
+            return None
+        x = self._transition(max(t - self.t, 0.0)) @ self.x
+        return float(x[0, 0]), float(x[0, 1])
+
+    @property
+    def velocity(self):
+        """当前估计的像素速度 (vx, vy)"""
+        if self.x is None:
+            return 0.0, 0.0
+        return float(self.x[1, 0]), float(self.x[1, 1])
+
+    @property
+    def position_std(self):
+        """当前位置估计的标准差（像素）"""
+        if self.P is None:
+            return float('inf')
+        return float(np.sqrt(self.P[0, 0]))
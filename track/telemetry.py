@@ -0,0 +1,136 @@
+import bisect
+import threading
+import time
+from collections import namedtuple
+from siyi_protocol import (ATTITUDE_REQUEST, STREAM_REQUEST, STREAM_ATTITUDE, STREAM_FREQS,
+                           CMD_ATTITUDE, pitch_from_device)
+
+# 带单调时钟时间戳的姿态样本（角度单位°，角速度单位°/s），俯仰角已换算到角度指令的坐标
+AttitudeSample = namedtuple('AttitudeSample', 't yaw pitch roll yaw_vel pitch_vel roll_vel')
+
+
+# ============================== 姿态遥测 ==============================
+class AttitudeTelemetry:
+    def __init__(self, transport, rate_hz=50, mode='stream', history_size=64):
+        """
+        持续获取云台姿态并发布最新样本。
+
+        stream 模式通过 0x25 指令让云台按固定频率主动推送姿态；poll 模式由后台线程
+        按 rate_hz 发送 0x0D 查询。上报的俯仰角先换算到与角度指令相同的坐标
+        （pitch_from_device），样本可直接与指令角度相加减。收到的姿态打上 time.monotonic() 时间戳后写入
+        最新值和定长历史环形缓冲区。写入只由读线程完成，读取方无需加锁。
+
+        Args:
+            transport (SerialTransport): 已启动的串口传输层。
+            rate_hz (float): 期望的采样频率，stream 模式取不低于它的最近档位。
+            mode (str): 'stream' 或 'poll'。
+            history_size (int): 历史环形缓冲区长度。
+        """
+        if mode not in ('stream', 'poll'):
+            raise ValueError(f"未知的遥测模式: {mode}")
+        self.transport = transport
+        self.rate_hz = rate_hz
+        self.mode = mode
+        self.latest = None
+        self.samples = 0
+        self._ring = [None] * history_size
+        self._running = False
+        self._poller = None
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self.transport.add_listener(self._on_message)
+        if self.mode == 'stream':
+            self.transport.send(STREAM_REQUEST, STREAM_ATTITUDE, self._stream_code(self.rate_hz))
+        else:
+            self._poller = threading.Thread(target=self._poll_loop, name="siyi-telemetry", daemon=True)
+            self._poller.start()
+        return self
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+        if self.mode == 'stream':
+            try:
+                self.transport.send(STREAM_REQUEST, STREAM_ATTITUDE, 0)
+            except Exception as e:
+                print(f"[遥测] 关闭姿态推送失败: {e}")
+        self.transport.remove_listener(self._on_message)
+
+    @staticmethod
+    def _stream_code(rate_hz):
+        """返回不低于 rate_hz 的最小推送频率档位"""
+        for code, freq in sorted(STREAM_FREQS.items()):
+            if freq >= rate_hz:
+                return code
+        return max(STREAM_FREQS)
+
+    def _poll_loop(self):
+        interval = 1.0 / self.rate_hz
+        next_time = time.monotonic()
+        while self._running:
+            self.transport.request(ATTITUDE_REQUEST, timeout=interval * 4, callback=self._on_reply)
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()  # 落后时不补发，避免请求堆积
+
+    def _on_reply(self, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._on_message(future.result())
+
+    def _on_message(self, msg):
+        if msg.cmd_id != CMD_ATTITUDE:
+            return
+        pitch, pitch_vel = pitch_from_device(msg.pitch, msg.pitch_vel)
+        sample = AttitudeSample(time.monotonic(), msg.yaw, pitch, msg.roll,
+                                msg.yaw_vel, pitch_vel, msg.roll_vel)
+        # 先写环形缓冲区再发布计数与最新值，读取方看到的都是完整样本
+        self._ring[self.samples % len(self._ring)] = sample
+        self.samples += 1
+        self.latest = sample
+
+    def history(self, max_age=None):
+        """按时间升序返回历史样本；max_age（秒）限制只返回最近的样本"""
+        count = self.samples
+        size = len(self._ring)
+        samples = [self._ring[i % size] for i in range(max(0, count - size), count)]
+        samples = sorted((s for s in samples if s is not None), key=lambda s: s.t)
+        if max_age is not None:
+            oldest = time.monotonic() - max_age
+            samples = [s for s in samples if s.t >= oldest]
+        return samples
+
+    def pose_at(self, t, max_extrapolation=0.1):
+        """
+        返回时刻 t 的插值姿态。
+
+        t 落在历史区间内时对相邻样本线性插值；晚于最新样本时按角速度外推，
+        最多 max_extrapolation 秒；早于最早样本时返回最早样本。无样本时返回 None。
+        """
+        samples = self.history()
+        if not samples:
+            return None
+        times = [s.t for s in samples]
+        i = bisect.bisect_left(times, t)
+        if i == 0:
+            return samples[0]
+        if i == len(samples):
+            last = samples[-1]
+            dt = min(t - last.t, max_extrapolation)
+            return last._replace(t=t, yaw=last.yaw + last.yaw_vel * dt,
+                                 pitch=last.pitch + last.pitch_vel * dt,
+                                 roll=last.roll + last.roll_vel * dt)
+        before, after = samples[i - 1], samples[i]
+        span = after.t - before.t
+        w = (t - before.t) / span if span > 0 else 1.0
+        return AttitudeSample(t, *(a + (b - a) * w for a, b in zip(before[1:], after[1:])))
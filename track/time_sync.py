@@ -0,0 +1,60 @@
+import math
+from collections import deque
+
+
+# ============================== 帧时间对齐 ==============================
+class FrameClock:
+    def __init__(self, window=150, fixed_delay=0.0):
+        """
+        把视频流时间戳映射到 time.monotonic() 时间轴，作为帧的采集时刻。
+
+        流时间戳（cv2.CAP_PROP_POS_MSEC）与本机时钟之间的偏移取最近 window 帧里
+        “到达时刻 - 流时间戳”的最小值：排队与解码只会让帧晚到，不会早到，
+        因此最小值最接近无排队时的偏移。流没有时间戳时退回到达时刻。
+
+        Args:
+            window (int): 估计偏移使用的帧数。
+            fixed_delay (float): 编码与网络传输的固定延迟（秒），从结果中扣除。
+        """
+        self.fixed_delay = fixed_delay
+        self._offsets = deque(maxlen=window)
+        self._last_stream_time = None
+
+    def reset(self):
+        self._offsets.clear()
+        self._last_stream_time = None
+
+    def stamp(self, stream_ms, arrival):
+        """
+        返回帧的采集时刻。
+
+        Args:
+            stream_ms (float): 流时间戳（毫秒），无效时传 None 或 0。
+            arrival (float): cap.read() 返回时的 time.monotonic()。
+        """
+        if not stream_ms or stream_ms <= 0:
+            return arrival - self.fixed_delay
+        stream_time = stream_ms / 1000.0
+        if self._last_stream_time is not None and stream_time < self._last_stream_time:
+            self._offsets.clear()  # 流时间戳回绕或重连
+        self._last_stream_time = stream_time
+        self._offsets.append(arrival - stream_time)
+        return stream_time + min(self._offsets) - self.fixed_delay
+
+
+def compensate_motion(point, pose_then, pose_now, focal_lengths):
+    """
+    把 pose_then 时刻画面中的像素点换算到 pose_now 时刻的画面坐标。
+
+    云台在两次姿态之间转过的角度会让目标在画面中反向移动，
+    方向约定与 CameraModel 一致（偏航/俯仰增大时画面向右/下移动）。
+
+    Args:
+        point (tuple): 像素坐标 (x, y)。
+        pose_then, pose_now (tuple): 两个时刻的云台 (yaw, pitch)（°）。
+        focal_lengths (tuple): (fx, fy)（像素）。
+    """
+    fx, fy = focal_lengths
+    d_yaw = math.radians(pose_now[0] - pose_then[0])
+    d_pitch = math.radians(pose_now[1] - pose_then[1])
+    return point[0] - fx * math.tan(d_yaw), point[1] - fy * math.tan(d_pitch)
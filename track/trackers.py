@@ -0,0 +1,370 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from box_ops import box_iou, greedy_match
+from detection_filter import LEFT, TOP, WIDTH, HEIGHT, CONF, to_deepsort
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # 没有 scipy 时只能用贪心匹配
+    linear_sum_assignment = None
+
+
+# ============================== 跟踪器接口 ==============================
+class Tracker(ABC):
+    """
+    多目标跟踪器接口。
+
+    update() 输入 extract_detections() 输出的 (N, 6) 检测数组，predict() 用于
+    不运行检测器的帧，只外推已有轨迹。两者都返回当前轨迹列表，轨迹对象提供
+    track_id、is_confirmed()、to_ltrb()、get_det_conf()，以及 DeepSort 约定的
+    状态 mean [cx, cy, a, h, vx, vy, va, vh] 与 covariance。
+    """
+
+    @abstractmethod
+    def update(self, detections, frame=None):
+        pass
+
+    @abstractmethod
+    def predict(self):
+        pass
+
+    @property
+    @abstractmethod
+    def tracks(self):
+        pass
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+    @abstractmethod
+    def matches(self):
+        """最近一次 update() 中各轨迹关联到的检测：{track_id: 输入检测数组的行号}"""
+
+    def select(self, track_id):
+        """告知当前选中的目标（None 为未选中），跟踪器可据此把开销集中在该目标上"""
+
+
+class DeepSortTracker(Tracker):
+    def __init__(self, max_age=30, selective=True, **kwargs):
+        """
+        DeepSort（运动 + 外观特征），kwargs 直接传给 DeepSort。
+
+        selective 为 True 时由 SelectiveEmbedding 决定哪些检测需要提取外观特征，
+        并在一次批量推理中完成；为 False 时与原来一样由 DeepSort 逐帧提取全部特征。
+        """
+        from deep_sort_realtime.deepsort_tracker import DeepSort
+        self.max_age = max_age
+        self.kwargs = kwargs
+        self.selected_id = None
+        self._matches = {}
+        if selective:
+            from appearance_embedding import CropEmbedder, SelectiveEmbedding
+            self.deepsort = DeepSort(max_age=max_age, embedder=None, **kwargs)
+            self.embedding = SelectiveEmbedding(CropEmbedder.mobilenet())
+        else:
+            self.deepsort = DeepSort(max_age=max_age, **kwargs)
+            self.embedding = None
+
+    @property
+    def tracks(self):
+        return self.deepsort.tracker.tracks
+
+    def select(self, track_id):
+        self.selected_id = track_id
+
+    def matches(self):
+        return self._matches
+
+    def update(self, detections, frame=None):
+        # 宽高为 0 的框会被 update_tracks 丢弃，先去掉以保证特征、others 与检测一一对应
+        keep = np.flatnonzero((detections[:, WIDTH] > 0) & (detections[:, HEIGHT] > 0))
+        detections = detections[keep]
+        if self.embedding is None:
+            # others 记录检测下标，用于得知每条轨迹本帧关联到了哪个检测
+            tracks = self.deepsort.update_tracks(to_deepsort(detections), frame=frame,
+                                                 others=list(range(len(detections))))
+            self._matches = {t.track_id: int(keep[j]) for t, j in self._matched(tracks)}
+            return tracks
+
+        boxes = np.column_stack([detections[:, LEFT], detections[:, TOP],
+                                 detections[:, LEFT] + detections[:, WIDTH],
+                                 detections[:, TOP] + detections[:, HEIGHT]])
+        tracks = self.tracks
+        track_ids = [t.track_id for t in tracks]
+        predicted = _ltrb(np.stack([t.mean for t in tracks]) @ _MOTION.T) if tracks else np.empty((0, 4))
+        lost = [t.time_since_update > 0 for t in tracks]
+        embeds = self.embedding.features(frame, boxes, track_ids, predicted, lost, self.selected_id)
+
+        # others 记录检测下标，用于得知每条轨迹本帧关联到了哪个检测
+        tracks = self.deepsort.update_tracks(to_deepsort(detections), embeds=embeds,
+                                             others=list(range(len(detections))))
+        matched = [(t.track_id, j) for t, j in self._matched(tracks)]
+        self._matches = {track_id: int(keep[j]) for track_id, j in matched}
+        self.embedding.commit(matched, [t.track_id for t in tracks])
+        return tracks
+
+    @staticmethod
+    def _matched(tracks):
+        return [(t, t.get_det_supplementary()) for t in tracks
+                if t.time_since_update == 0 and t.get_det_supplementary() is not None]
+
+    def predict(self):
+        """无检测帧：只推进卡尔曼预测，不计为跟踪丢失"""
+        tracker = self.deepsort.tracker
+        tracker.predict()
+        for track in tracker.tracks:
+            # 抵消 predict() 中的计数，下次检测时仍按连续帧参与 IoU 关联与确认
+            track.time_since_update -= 1
+        if self.embedding is not None:
+            self.embedding.tick()
+        self._matches = {}
+        return tracker.tracks
+
+    def reset(self):
+        self._matches = {}
+        self.deepsort.delete_all_tracks()
+        if self.embedding is not None:
+            self.embedding.reset()
+
+
+# ============================== 卡尔曼滤波（批量） ==============================
+_NDIM = 4
+_MOTION = np.eye(2 * _NDIM)
+_MOTION[:_NDIM, _NDIM:] = np.eye(_NDIM)
+_PROJECT = np.eye(_NDIM, 2 * _NDIM)
+_STD_POSITION = 1.0 / 20
+_STD_VELOCITY = 1.0 / 160
+
+
+def _xyah(ltwh):
+    ltwh = np.asarray(ltwh, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack([ltwh[:, 0] + ltwh[:, 2] / 2, ltwh[:, 1] + ltwh[:, 3] / 2,
+                            ltwh[:, 2] / np.maximum(ltwh[:, 3], 1e-6), ltwh[:, 3]])
+
+
+def _ltrb(mean):
+    mean = np.asarray(mean).reshape(-1, 2 * _NDIM)
+    w = mean[:, 2] * mean[:, 3]
+    h = mean[:, 3]
+    return np.column_stack([mean[:, 0] - w / 2, mean[:, 1] - h / 2, mean[:, 0] + w / 2, mean[:, 1] + h / 2])
+
+
+def _kf_initiate(xyah):
+    h = xyah[3]
+    mean = np.concatenate([xyah, np.zeros(_NDIM)])
+    std = np.array([2 * _STD_POSITION * h, 2 * _STD_POSITION * h, 1e-2, 2 * _STD_POSITION * h,
+                    10 * _STD_VELOCITY * h, 10 * _STD_VELOCITY * h, 1e-5, 10 * _STD_VELOCITY * h])
+    return mean, np.diag(std ** 2)
+
+
+def _kf_predict(means, covariances):
+    """与 deep_sort 的 KalmanFilter.predict 相同，按轨迹批量计算"""
+    h = means[:, 3]
+    std = np.column_stack([_STD_POSITION * h, _STD_POSITION * h, np.full_like(h, 1e-2), _STD_POSITION * h,
+                           _STD_VELOCITY * h, _STD_VELOCITY * h, np.full_like(h, 1e-5), _STD_VELOCITY * h])
+    means = means @ _MOTION.T
+    covariances = _MOTION @ covariances @ _MOTION.T
+    covariances[:, np.arange(8), np.arange(8)] += std ** 2
+    return means, covariances
+
+
+def _kf_update(means, covariances, measurements):
+    """与 deep_sort 的 KalmanFilter.update 相同，按配对批量计算"""
+    h = means[:, 3]
+    std = np.column_stack([_STD_POSITION * h, _STD_POSITION * h, np.full_like(h, 1e-1), _STD_POSITION * h])
+    projected_cov = _PROJECT @ covariances @ _PROJECT.T
+    projected_cov[:, np.arange(4), np.arange(4)] += std ** 2
+    cross = covariances @ _PROJECT.T  # (K, 8, 4)
+    gain = np.linalg.solve(projected_cov, cross.transpose(0, 2, 1)).transpose(0, 2, 1)
+    innovation = measurements - means[:, :_NDIM]
+    means = means + np.einsum('kij,kj->ki', gain, innovation)
+    covariances = covariances - gain @ projected_cov @ gain.transpose(0, 2, 1)
+    return means, covariances
+
+
+# ============================== 轻量运动跟踪器 ==============================
+class MotionTrack:
+    TENTATIVE, CONFIRMED, DELETED = 1, 2, 3
+
+    def __init__(self, track_id, mean, covariance, confidence, det_class, n_init):
+        self.track_id = track_id
+        self.mean = mean
+        self.covariance = covariance
+        self.det_conf = confidence
+        self.det_class = det_class
+        self.hits = 1
+        self.age = 1
+        self.time_since_update = 0
+        self.state = MotionTrack.CONFIRMED if n_init <= 1 else MotionTrack.TENTATIVE
+        self._n_init = n_init
+
+    def is_confirmed(self):
+        return self.state == MotionTrack.CONFIRMED
+
+    def is_tentative(self):
+        return self.state == MotionTrack.TENTATIVE
+
+    def is_deleted(self):
+        return self.state == MotionTrack.DELETED
+
+    def to_ltrb(self):
+        return _ltrb(self.mean)[0]
+
+    def get_det_conf(self):
+        """本次关联到的检测置信度，未关联时为 None"""
+        return self.det_conf
+
+
+class ByteTracker(Tracker):
+    def __init__(self, max_age=30, n_init=3, high_threshold=0.5, low_threshold=0.1,
+                 new_track_threshold=0.6, match_iou=0.2, low_match_iou=0.5, tentative_match_iou=0.3,
+                 assignment='hungarian'):
+        """
+        只用运动信息的 ByteTrack 式跟踪器，纯 numpy 实现。
+
+        卡尔曼滤波与 DeepSort 相同（状态 [cx, cy, a, h] 及其速度），所有轨迹批量预测。
+        关联分两步：先用高置信度检测与全部已确认轨迹按 IoU 匹配，再用低置信度
+        检测匹配剩余的已确认轨迹（找回被遮挡、模糊的目标）；未确认轨迹只与
+        剩下的高置信度检测匹配。未匹配且置信度足够高的检测新建轨迹。
+
+        Args:
+            max_age (int): 已确认轨迹连续未匹配的最大次数。
+            n_init (int): 连续匹配多少次后确认。
+            high_threshold, low_threshold (float): 高/低置信度检测的分界与下限。
+            new_track_threshold (float): 新建轨迹所需的最低置信度。
+            match_iou, low_match_iou, tentative_match_iou (float): 三次匹配的最低 IoU。
+            assignment (str): 'hungarian'（需要 scipy）或 'greedy'。
+        """
+        if assignment not in ('hungarian', 'greedy'):
+            raise ValueError(f"未知的匹配方式: {assignment}")
+        self.max_age = max_age
+        self.n_init = n_init
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.new_track_threshold = new_track_threshold
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.tentative_match_iou = tentative_match_iou
+        self.assignment = assignment if linear_sum_assignment is not None else 'greedy'
+        self.reset()
+
+    def reset(self):
+        self._tracks = []
+        self._next_id = 1
+        self._matches = {}
+
+    def matches(self):
+        return self._matches
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    def _predict_all(self):
+        if not self._tracks:
+            return
+        means, covariances = _kf_predict(np.stack([t.mean for t in self._tracks]),
+                                         np.stack([t.covariance for t in self._tracks]))
+        for track, mean, covariance in zip(self._tracks, means, covariances):
+            track.mean = mean
+            track.covariance = covariance
+            track.age += 1
+            track.det_conf = None
+
+    def predict(self):
+        """无检测帧：只推进卡尔曼预测，不计为跟踪丢失"""
+        self._predict_all()
+        self._matches = {}
+        return self._tracks
+
+    def _assign(self, tracks, boxes, min_iou):
+        """返回 (匹配对, 未匹配轨迹下标, 未匹配检测下标)，下标均相对于传入的列表"""
+        if not tracks or not len(boxes):
+            return [], list(range(len(tracks))), list(range(len(boxes)))
+        iou = box_iou(_ltrb(np.stack([t.mean for t in tracks])), boxes)
+        if self.assignment == 'hungarian':
+            rows, cols = linear_sum_assignment(-iou)
+            pairs = [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if iou[r, c] >= min_iou]
+        else:
+            pairs = greedy_match(iou, min_iou)
+        matched_tracks = {r for r, _ in pairs}
+        matched_dets = {c for _, c in pairs}
+        return (pairs, [i for i in range(len(tracks)) if i not in matched_tracks],
+                [j for j in range(len(boxes)) if j not in matched_dets])
+
+    def update(self, detections, frame=None):
+        self._predict_all()
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        keep = np.flatnonzero(detections[:, CONF] >= self.low_threshold)
+        detections = detections[keep]
+        boxes = np.column_stack([detections[:, LEFT], detections[:, TOP],
+                                 detections[:, LEFT] + detections[:, WIDTH],
+                                 detections[:, TOP] + detections[:, HEIGHT]])
+        high = np.flatnonzero(detections[:, CONF] >= self.high_threshold)
+        low = np.flatnonzero(detections[:, CONF] < self.high_threshold)
+
+        confirmed = [t for t in self._tracks if t.is_confirmed()]
+        tentative = [t for t in self._tracks if t.is_tentative()]
+        matches = []  # (track, 检测下标)
+
+        # 第一步：已确认轨迹 × 高置信度检测
+        pairs, rest_tracks, rest_high = self._assign(confirmed, boxes[high], self.match_iou)
+        matches += [(confirmed[r], high[c]) for r, c in pairs]
+        rest_high = high[rest_high]
+        # 第二步：剩余已确认轨迹 × 低置信度检测
+        remaining = [confirmed[i] for i in rest_tracks]
+        pairs, rest_tracks, _ = self._assign(remaining, boxes[low], self.low_match_iou)
+        matches += [(remaining[r], low[c]) for r, c in pairs]
+        missed = [remaining[i] for i in rest_tracks]
+        # 未确认轨迹 × 剩余高置信度检测
+        pairs, rest_tentative, rest_new = self._assign(tentative, boxes[rest_high], self.tentative_match_iou)
+        matches += [(tentative[r], rest_high[c]) for r, c in pairs]
+        unmatched_dets = rest_high[rest_new]
+
+        self._matches = {t.track_id: int(keep[d]) for t, d in matches}
+        if matches:
+            tracks = [t for t, _ in matches]
+            index = np.array([d for _, d in matches])
+            means, covariances = _kf_update(np.stack([t.mean for t in tracks]),
+                                            np.stack([t.covariance for t in tracks]),
+                                            _xyah(detections[index, :4]))
+            for track, mean, covariance, d in zip(tracks, means, covariances, index):
+                track.mean = mean
+                track.covariance = covariance
+                track.det_conf = float(detections[d, CONF])
+                track.det_class = int(detections[d, 5])
+                track.hits += 1
+                track.time_since_update = 0
+                if track.is_tentative() and track.hits >= self.n_init:
+                    track.state = MotionTrack.CONFIRMED
+
+        for track in missed:
+            track.time_since_update += 1
+            if track.time_since_update > self.max_age:
+                track.state = MotionTrack.DELETED
+        for i in rest_tentative:
+            tentative[i].state = MotionTrack.DELETED
+
+        for d in unmatched_dets:
+            if detections[d, CONF] < self.new_track_threshold:
+                continue
+            mean, covariance = _kf_initiate(_xyah(detections[d, :4])[0])
+            self._tracks.append(MotionTrack(str(self._next_id), mean, covariance,
+                                            float(detections[d, CONF]), int(detections[d, 5]), self.n_init))
+            self._matches[str(self._next_id)] = int(keep[d])
+            self._next_id += 1
+
+        self._tracks = [t for t in self._tracks if not t.is_deleted()]
+        return self._tracks
+
+
+# ============================== 按配置创建 ==============================
+TRACKERS = {'deepsort': DeepSortTracker, 'bytetrack': ByteTracker}
+
+
+def create_tracker(kind='deepsort', **kwargs):
+    """按名称创建跟踪器：'deepsort'（外观 + 运动）或 'bytetrack'（仅运动，纯 numpy）"""
+    if kind not in TRACKERS:
+        raise ValueError(f"未知的跟踪器: {kind}")
+    return TRACKERS[kind](**kwargs)
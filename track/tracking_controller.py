@@ -0,0 +1,108 @@
+import time
+
+
+# ============================== PID 控制器 ==============================
+class PIDController:
+    def __init__(self, kp, ki=0.0, kd=0.0, output_limit=100.0, integral_limit=None):
+        """
+        带抗积分饱和与输出限幅的 PID 控制器。
+
+        微分项作用在测量值（误差）的变化率上，积分项单独限幅，并在输出饱和且误差
+        同向时停止积分（条件积分）。
+
+        Args:
+            kp, ki, kd (float): 比例、积分、微分增益。
+            output_limit (float): 输出限幅 ±output_limit。
+            integral_limit (float): 积分项贡献的限幅，缺省与 output_limit 相同。
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limit = output_limit
+        self.integral_limit = output_limit if integral_limit is None else integral_limit
+        self.reset()
+
+    def reset(self):
+        self._integral = 0.0
+        self._last_error = None
+        self._last_time = None
+
+    def update(self, error, now=None, integrate=True):
+        """
+        输入当前误差，返回限幅后的控制量。
+
+        Args:
+            error (float): 当前误差。
+            now (float): 时间戳（秒），缺省取 time.monotonic()。
+            integrate (bool): 为 False 时冻结积分（如误差处于死区内）。
+        """
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self._last_time is None else now - self._last_time
+        derivative = 0.0
+        if dt > 0 and self._last_error is not None:
+            derivative = (error - self._last_error) / dt
+        self._last_error = error
+        self._last_time = now
+
+        unclamped = self.kp * error + self._integral + self.kd * derivative
+        saturated = abs(unclamped) >= self.output_limit and (unclamped > 0) == (error > 0)
+        if integrate and dt > 0 and not saturated:
+            self._integral += self.ki * error * dt
+            self._integral = max(min(self._integral, self.integral_limit), -self.integral_limit)
+
+        output = self.kp * error + self._integral + self.kd * derivative
+        return max(min(output, self.output_limit), -self.output_limit)
+
+
+# ============================== 速度模式追踪 ==============================
+class VelocityTrackController:
+    def __init__(self, deadband=30, kp=0.12, ki=0.02, kd=0.002, max_speed=100,
+                 yaw_sign=1, pitch_sign=1):
+        """
+        把目标相对画面中心的像素误差转换为云台转速指令（0x07，-100~100）。
+
+        偏航、俯仰各用一个 PID，误差在 deadband 像素以内时该轴输出 0 并冻结积分。
+        方向约定与原 auto_track 的角度增量一致：目标在右/下方时输出为正。
+
+        Args:
+            deadband (int): 死区（像素），沿用 VideoThread.centered_threshold。
+            kp, ki, kd (float): 像素误差到转速的 PID 增益（两轴共用）。
+            max_speed (int): 输出限幅。
+            yaw_sign, pitch_sign (int): 安装方向不同时用于翻转对应轴。
+        """
+        self.deadband = deadband
+        self.yaw_sign = yaw_sign
+        self.pitch_sign = pitch_sign
+        self.yaw_pid = PIDController(kp, ki, kd, output_limit=max_speed)
+        self.pitch_pid = PIDController(kp, ki, kd, output_limit=max_speed)
+
+    def reset(self):
+        self.yaw_pid.reset()
+        self.pitch_pid.reset()
+
+    def _axis(self, pid, error, now):
+        if abs(error) < self.deadband:
+            pid.update(0.0, now, integrate=False)
+            return 0
+        # 死区外的误差扣除死区宽度，避免进出死区时速度跳变
+        error = error - self.deadband if error > 0 else error + self.deadband
+        return int(round(pid.update(error, now)))
+
+    def update(self, target_center, frame_size, now=None):
+        """
+        根据目标中心与画面尺寸计算转速。
+
+        Args:
+            target_center (tuple): 目标中心像素坐标 (x, y)。
+            frame_size (tuple): 画面尺寸 (宽, 高)。
+            now (float): 时间戳（秒）。
+
+        Returns:
+            tuple: (yaw_speed, pitch_speed)。
+        """
+        now = time.monotonic() if now is None else now
+        error_x = target_center[0] - frame_size[0] / 2
+        error_y = target_center[1] - frame_size[1] / 2
+        yaw_speed = self._axis(self.yaw_pid, error_x, now)
+        pitch_speed = self._axis(self.pitch_pid, error_y, now)
+        return self.yaw_sign * yaw_speed, self.pitch_sign * pitch_speed
@@ -0,0 +1,248 @@
+import threading
+import time
+from collections import deque
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+_CLOSED = object()
+
+
+# ============================== 有界队列 ==============================
+class StageQueue:
+    def __init__(self, maxsize=2, policy=DROP_OLDEST):
+        """
+        流水线级间的有界队列。
+
+        队列满时按 policy 处理：'block' 阻塞生产者直到有空位（离线处理、
+        不允许丢帧），'drop_oldest' 丢弃最旧的一项（实时画面，保持低延迟）。
+
+        Args:
+            maxsize (int): 队列容量。
+            policy (str): 'block' 或 'drop_oldest'。
+        """
+        if policy not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"未知的背压策略: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """放入一项，队列已关闭时直接丢弃并返回 False"""
+        with self._cond:
+            if self.policy == BLOCK:
+                self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """取出一项；超时返回 None，队列关闭且已取空时返回 _CLOSED"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return _CLOSED
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self, discard=False):
+        """关闭队列：消费者取完剩余项后退出，discard 为 True 时清空剩余项"""
+        with self._cond:
+            self._closed = True
+            if discard:
+                self._items.clear()
+            self._cond.notify_all()
+
+
+# ============================== 流水线级 ==============================
+class Stage(threading.Thread):
+    def __init__(self, name, func, inbox=None, outbox=None, fps_window=2.0):
+        """
+        在独立线程中处理一级任务。
+
+        有 inbox 时从中取出每一项调用 func(item)；没有 inbox 的是源头级，反复调用
+        func() 产生新项。func 返回 None 表示不向下游传递，抛出 StopIteration
+        表示数据源结束。结果放入 outbox（最后一级没有 outbox）。func 抛出其他
+        异常时只丢弃这一项并记录，本级继续处理后续各项，只在输入队列关闭、
+        数据源结束或 stop() 时退出。
+
+        Args:
+            name (str): 级名称。
+            func (callable): 处理函数。
+            inbox, outbox (StageQueue): 输入、输出队列。
+            fps_window (float): 统计帧率的时间窗口（秒）。
+        """
+        super().__init__(name=f"stage-{name}", daemon=True)
+        self.stage_name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.fps_window = fps_window
+        self.processed = 0
+        self.busy_time = 0.0  # 处理函数累计耗时（秒）
+        self.error = None  # 最近一次处理出错的异常
+        self.errors = 0
+        self._times = deque()
+        self._running = True
+
+    @property
+    def fps(self):
+        times = list(self._times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def run(self):
+        try:
+            while self._running:
+                if self.inbox is None:
+                    item = None
+                else:
+                    item = self.inbox.get(timeout=0.1)
+                    if item is None:
+                        continue
+                    if item is _CLOSED:
+                        break
+                start = time.monotonic()
+                try:
+                    result = self.func() if self.inbox is None else self.func(item)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    self._record_error(e)
+                    continue  # 丢弃出错的一项
+                if result is None and self.inbox is None:
+                    continue  # 源头暂时没有新数据
+                end = time.monotonic()
+                self.busy_time += end - start
+                self.processed += 1
+                self._times.append(end)
+                while self._times and end - self._times[0] > self.fps_window:
+                    self._times.popleft()
+                if result is not None and self.outbox is not None:
+                    self.outbox.put(result)
+        finally:
+            if self.outbox is not None:
+                self.outbox.close()
+
+    def _record_error(self, error):
+        # 连续出现同一错误时只打印第一次，避免逐帧刷屏
+        if self.error is None or repr(error) != repr(self.error):
+            print(f"[流水线 {self.stage_name}] {error!r}（已丢弃该帧）")
+        self.error = error
+        self.errors += 1
+
+    def stop(self):
+        self._running = False
+
+
+# ============================== 视频流水线 ==============================
+class VideoPipeline:
+    def __init__(self, source, queue_size=2, policy=DROP_OLDEST, source_name='decode'):
+        """
+        由若干级组成的视频处理流水线，例如 解码 → 检测 → 跟踪 → 渲染。
+
+        每级运行在各自的线程中，级间用小容量有界队列连接，不同帧的各级处理
+        相互重叠，吞吐量由最慢的一级而不是各级耗时之和决定。
+
+        Args:
+            source (callable): 源头级函数，每次调用返回一项，StopIteration 表示结束。
+            queue_size (int): 缺省的级间队列容量。
+            policy (str): 缺省的背压策略，'block' 或 'drop_oldest'。
+            source_name (str): 源头级名称。
+        """
+        self.queue_size = queue_size
+        self.policy = policy
+        self.stages = [Stage(source_name, source)]
+        self._started = False
+
+    def add_stage(self, name, func, queue_size=None, policy=None):
+        """在末尾追加一级，func(item) 的返回值传给下一级"""
+        if self._started:
+            raise RuntimeError("流水线已启动，不能再添加处理级")
+        queue = StageQueue(queue_size or self.queue_size, policy or self.policy)
+        self.stages[-1].outbox = queue
+        self.stages.append(Stage(name, func, inbox=queue))
+        return self
+
+    def start(self):
+        self._started = True
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    @property
+    def finished(self):
+        """最后一级已退出（数据源结束或已停止）"""
+        return self._started and not self.stages[-1].is_alive()
+
+    def wait(self, timeout=None):
+        self.stages[-1].join(timeout)
+        return not self.stages[-1].is_alive()
+
+    def stop(self, timeout=2.0):
+        for stage in self.stages:
+            stage.stop()
+            if stage.outbox is not None:
+                stage.outbox.close(discard=True)
+        for stage in self.stages:
+            if stage.is_alive():
+                stage.join(timeout)
+
+    def stats(self):
+        """每级的帧率、平均处理耗时（毫秒）、输入队列深度、丢弃数与出错次数"""
+        result = []
+        for stage in self.stages:
+            result.append({
+                'name': stage.stage_name,
+                'fps': stage.fps,
+                'busy_ms': stage.busy_time / stage.processed * 1000 if stage.processed else 0.0,
+                'queue_depth': len(stage.inbox) if stage.inbox is not None else 0,
+                'dropped': stage.inbox.dropped if stage.inbox is not None else 0,
+                'errors': stage.errors,
+            })
+        return result
+
+    def summary(self):
+        """一行一级的文字统计，用于界面显示"""
+        return "\n".join(f"{s['name']}: {s['fps']:.1f}fps  队列 {s['queue_depth']}  丢弃 {s['dropped']}"
+                         for s in self.stats())
+
+
+# ============================== 帧数据 ==============================
+class FramePacket:
+    """在流水线各级之间传递的一帧及其处理结果"""
+    __slots__ = ('frame', 'capture_time', 'index', 'roi', 'detections', 'tracks', 'info')
+
+    def __init__(self, frame, capture_time, index):
+        self.frame = frame
+        self.capture_time = capture_time
+        self.index = index
+        self.roi = None  # 检测所用的搜索窗口 (x1, y1, x2, y2)，None 为全画面
+        self.detections = None
+        self.tracks = None
+        self.info = None
+
+
+def grabber_source(grabber, poll=0.5):
+    """把 FrameGrabber 包装为流水线的源头级函数"""
+    def source():
+        item = grabber.read(timeout=poll)
+        if item is None:
+            if grabber.finished:
+                raise StopIteration
+            return None
+        return FramePacket(*item)
+    return source
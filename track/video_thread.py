@@ -1,50 +1,87 @@
 import cv2, os
 import time
-import serial
 import sys
-from PyQt5.QtGui import QImage
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer, QReadWriteLock, QWriteLocker
-from ultralytics import YOLO
-from deep_sort_realtime.deepsort_tracker import DeepSort
-from gimbal_control import control_gimbal, send_home_command
+from PyQt5.QtCore import QThread, pyqtSignal
+from gimbal_link import open_link
+from serial_transport import SerialTransport
+from serial_writer import SerialWriter
+from telemetry import AttitudeTelemetry
+from control_loop import ControlLoop
+from frame_capture import FrameGrabber
+from video_pipeline import VideoPipeline, grabber_source, DROP_OLDEST
+from frame_presenter import FramePresenter
+from detection_scheduler import DetectionScheduler
+from roi_detector import RoiPlanner
+from inference_preprocess import Letterbox
+from detection_filter import extract_detections
+from inference_backend import load_detector, pin_cpus
+from trackers import create_tracker
+from lock_on import LockOnTracker
 
 
 # ============================== 视频处理线程 ==============================
 class VideoThread(QThread):
-    change_pixmap = pyqtSignal(QImage)
+    change_pixmap = pyqtSignal(object)  # PresentedFrame，界面显示后需调用 release()
     update_info = pyqtSignal(str)
     tracking_status = pyqtSignal(bool)
     target_selected = pyqtSignal(bool)
 
-    def __init__(self, model_path, rtsp_url, serial_port):
+    def __init__(self, model_path, rtsp_url, serial_port, command_rate=20, telemetry_rate=50,
+                 control_rate=50, track_mode='velocity', predict_model='cv',
+                 queue_size=2, backpressure=DROP_OLDEST, detect_budget=1 / 30, max_detect_interval=8,
+                 roi_detection=True, inference_sizes=(640,), device='auto', backend='auto',
+                 inference_threads=None, inference_cpus=None, tracker='deepsort', lock_on=None, zoom=1.0):
         super().__init__()
         if getattr(sys, 'frozen', False):
-            model_path = os.path.join(sys._MEIPASS, "yolov8n-face.pt")
-        else:
-            model_path = "yolov8n-face.pt"
+            model_path = os.path.join(sys._MEIPASS, os.path.basename(model_path))
         self.tracks = None
-        self.ser = serial.Serial(serial_port, 115200, timeout=2)
-        self.serial_lock = QReadWriteLock()
-        self.model = YOLO(model_path).to('cuda')
-        self.tracker = DeepSort(max_age=30)
-        self.cap = cv2.VideoCapture(rtsp_url)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
-        self.cap.set(cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
+        self.ser = open_link(serial_port, 115200, timeout=2)
+        self.transport = SerialTransport(self.ser).start()
+        self.writer = SerialWriter(self.transport, max_rate=command_rate)
+        self.writer.start()
+        self.telemetry = AttitudeTelemetry(self.transport, rate_hz=telemetry_rate).start()
+        self.centered_threshold = 30  # 阈值设为30像素
+        self.control = ControlLoop(self.writer, self.transport, self.telemetry, rate_hz=control_rate,
+                                   track_mode=track_mode, predict_model=predict_model,
+                                   deadband=self.centered_threshold, zoom=zoom)
+        self.control.start()
+        # 有 GPU 用 CUDA，只有 CPU 时用导出的 OpenVINO / ONNX 模型；inference_cpus 为推理绑定的 CPU 编号
+        self.model = load_detector(model_path, device=device, backend=backend, threads=inference_threads,
+                                   cpus=inference_cpus)
+        self.inference_cpus = inference_cpus
+        self._detect_pinned = False
+        # 'deepsort' 用外观特征，'bytetrack' 只用运动信息，开销小得多
+        self.tracker = create_tracker(tracker, max_age=30)
+        # 检测器每 N 帧运行一次，N 随耗时预算与目标运动自动调整，其余帧由跟踪器外推
+        self.letterbox = Letterbox(inference_sizes)  # 推理尺寸，可配置多个，按输入长边选用
+        self.scheduler = DetectionScheduler(budget=detect_budget, max_interval=max_detect_interval)
+        # 锁定目标后只在预测位置附近检测，roi_hint 由跟踪级发布、检测级读取
+        self.roi_planner = RoiPlanner() if roi_detection else None
+        self.roi_hint = None
+        # lock_on 为 'kcf' 等时，自动跟踪期间由单目标跟踪器逐帧更新目标框，检测器只定期校验
+        self.lock = LockOnTracker(lock_on) if lock_on else None
+        self.grabber = FrameGrabber(rtsp_url)  # 独立采集线程，只保留最新一帧
+        self.cap = self.grabber.cap
+        self.frame_size = self.grabber.frame_size()
+        self.presenter = FramePresenter()  # 在渲染级缩放到显示尺寸，复用预分配缓冲区
+        # 检测 → 跟踪 → 渲染 各占一个线程，与解码线程并行
+        self.pipeline = (VideoPipeline(grabber_source(self.grabber), queue_size=queue_size, policy=backpressure)
+                         .add_stage('detect', self.detect_stage)
+                         .add_stage('track', self.track_stage)
+                         .add_stage('render', self.render_stage))
         self.selected_id = None
         self.running = True
-        self.current_yaw = 0
-        self.current_pitch = 0
         self.step_size = 5
+        self.nudge_rate = self.step_size * 10  # 按住方向键时的转速（°/s），与原 100ms 一步相同
         self.tracking_enabled = False
         self.target_center = None
-        self.centered_threshold = 30  # 阈值设为30像素
-        self.auto_track_timer = QTimer()
-        self.auto_track_timer.timeout.connect(self.auto_track)
 
     def mouse_callback(self, x, y):
         self.selected_id = None
         self.target_center = None
+        self.control.select_target()
+        self.scheduler.clear_target()
+        self.clear_roi()
         for track in self.tracks:
             if not track.is_confirmed():
                 continue
@@ -57,114 +94,221 @@ class VideoThread(QThread):
         self.target_selected.emit(False)
 
     def run(self):
-        control_gimbal(self.ser, self.current_yaw, self.current_pitch)
+        self.control.set_angle(0, 0)
         time.sleep(1)
 
-        while self.running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-
-            results = self.model(frame, verbose=False)[0]
-            detections = [(box.xyxy[0].cpu().numpy(), box.conf.item(), box.cls.item())
-                          for box in results.boxes]
-
-            self.tracks = self.tracker.update_tracks(
-                [([x1, y1, x2 - x1, y2 - y1], conf, cls_id)
-                 for (x1, y1, x2, y2), conf, cls_id in detections],
-                frame=frame
-            )
-
-            info_text = "当前跟踪目标信息：\n暂无选择"
-            for track in self.tracks:
-                if not track.is_confirmed():
-                    continue
-                track_id = track.track_id
-                ltrb = track.to_ltrb()
-                x1, y1, x2, y2 = map(int, ltrb)
-
-                if self.selected_id is None:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, f"ID: {track_id}", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                if self.selected_id and track_id == self.selected_id:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(frame, f"Tracking ID: {track_id}", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-                    self.target_center = ((x1 + x2) // 2, (y1 + y2) // 2)
-                    info_text = f"跟踪目标ID: {track_id}\n坐标范围:\nX: {x1}-{x2}\nY: {y1}-{y2}"
-
-            self.update_info.emit(info_text)
-
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.change_pixmap.emit(qt_image)
+        self.grabber.start()
+        self.pipeline.start()
+        while self.running and not self.pipeline.wait(0.5):
+            pass
 
-    def move_gimbal(self, delta_yaw, delta_pitch):
-        self.current_yaw = max(min(self.current_yaw + delta_yaw, 135), -135)
-        self.current_pitch = max(min(self.current_pitch + delta_pitch, 25), -90)
-        with QWriteLocker(self.serial_lock):
-            control_gimbal(self.ser, self.current_yaw, self.current_pitch)
+    def detect_stage(self, packet):
+        if not self._detect_pinned:
+            # 检测级线程自身也绑定到推理 CPU
+            pin_cpus(self.inference_cpus)
+            self._detect_pinned = True
+        verify = self.lock.wants_detection(packet.index) if self.lock is not None else None
+        if verify is None:
+            if not self.scheduler.should_detect(packet.index):
+                return packet  # detections 为 None：本帧只做跟踪预测
+        elif not verify:
+            return packet  # 锁定期间只在校验时检测
+        start = time.monotonic()
+        frame = packet.frame
+        if self.roi_planner is not None and self.selected_id is not None:
+            packet.roi = self.roi_planner.plan(self.frame_size, self.roi_hint, packet.index)
+        if packet.roi is not None:
+            x1, y1, x2, y2 = packet.roi
+            image, transform = self.letterbox(frame[y1:y2, x1:x2], self.roi_planner.imgsz(packet.roi))
+        else:
+            image, transform = self.letterbox(frame)
+        # 画布已是推理尺寸，模型内部的缩放为恒等变换，输出框在画布坐标下
+        results = self.model(image, imgsz=image.shape[:2], verbose=False)[0]
+        # 一次拷回主机后向量化过滤，得到 [left, top, width, height, conf, cls]
+        packet.detections = extract_detections(results.boxes.data, transform,
+                                               packet.roi[:2] if packet.roi is not None else None)
+        self.scheduler.record_detection(time.monotonic() - start)
+        return packet
 
-    def return_home(self):
-        self.current_yaw = 0
-        self.current_pitch = 0
-        send_home_command(self.ser)
-
-    def auto_track(self):
-        # if not self.tracking_enabled or not self.target_center:
-        #     self.stop_auto_track()
-        #     return
-        if not self.tracking_enabled:
-            return
+    def track_stage(self, packet):
+        frame = packet.frame
+        self.frame_size = (frame.shape[1], frame.shape[0])
+        detected = packet.detections is not None
+        if detected:
+            self.tracker.select(self.selected_id)  # 外观特征只为可能是选中目标或有歧义的检测提取
+            self.tracks = self.tracker.update(packet.detections, frame)
+        else:
+            self.tracks = self.tracker.predict()
+
+        # 记录本帧要绘制的框，渲染级不再访问会被下一帧改写的跟踪器状态
+        packet.tracks = []
+        packet.info = "当前跟踪目标信息：\n暂无选择"
+        selected_id = self.selected_id
+        target_found = False
+        for track in self.tracks:
+            if not track.is_confirmed():
+                continue
+            track_id = track.track_id
+            x1, y1, x2, y2 = map(int, track.to_ltrb())
+
+            if selected_id is None:
+                packet.tracks.append((track_id, (x1, y1, x2, y2), False))
 
-        W, H = 1920, 1080
-        frame_center = (W // 2, H // 2)
+            if selected_id and track_id == selected_id:
+                packet.tracks.append((track_id, (x1, y1, x2, y2), True))
+                self.target_center = ((x1 + x2) // 2, (y1 + y2) // 2)
+                target_found = True
+                if detected:
+                    confidence = track.get_det_conf()
+                    self.scheduler.observe_target(packet.index, (x1, y1, x2, y2) if confidence is not None else None,
+                                                  confidence)
+                    self.update_roi(packet.index, track, confidence is not None)
+                packet.info = f"跟踪目标ID: {track_id}\n坐标范围:\nX: {x1}-{x2}\nY: {y1}-{y2}"
 
-        if self.target_center:
-            delta_x = self.target_center[0] - frame_center[0]
-            delta_y = self.target_center[1] - frame_center[1]
+        matched_box = None
+        if selected_id is not None and detected:
+            # 锁定用检测器给出的原始框，而不是卡尔曼平滑后的轨迹框
+            row = self.tracker.matches().get(selected_id)
+            if row is not None:
+                left, top, width, height = packet.detections[row, :4]
+                matched_box = (left, top, left + width, top + height)
+        if selected_id is not None and detected and not target_found:
+            self.scheduler.observe_target(packet.index, None, None)
+            if self.roi_planner is not None:
+                self.roi_planner.report(False)
+        lock_box = self.update_lock(packet, detected, matched_box)
+        if lock_box is not None:
+            # 锁定期间单目标跟踪器每帧都给出观测
+            x1, y1, x2, y2 = map(int, lock_box)
+            packet.tracks = [t for t in packet.tracks if not t[2]] + [(selected_id, (x1, y1, x2, y2), True)]
+            self.target_center = ((x1 + x2) // 2, (y1 + y2) // 2)
+            packet.info = (f"跟踪目标ID: {selected_id}\n坐标范围:\nX: {x1}-{x2}\nY: {y1}-{y2}"
+                           f"\n锁定跟踪: {self.lock.kind}  相关系数: {self.lock.score:.2f}")
+            self.control.observe(self.target_center, packet.capture_time, self.frame_size)
+        # 控制线程有自己的预测器，只送入检测帧的观测
+        elif selected_id is not None and detected:
+            self.control.observe(self.target_center if target_found else None, packet.capture_time,
+                                 self.frame_size)
+        return packet
+
+    def update_lock(self, packet, detected, matched_box):
+        """
+        自动跟踪时的锁定快速路径，返回本帧的目标框，未锁定或本帧跟踪失败时返回 None。
+
+        开始自动跟踪后，用选中目标最近一次的检测框初始化单目标跟踪器；之后
+        检测帧上找到目标就用检测框重新定位，连续找不到则解除锁定，恢复常规检测。
+        """
+        lock = self.lock
+        if lock is None:
+            return None
+        if not self.tracking_enabled or self.selected_id is None or lock.target != self.selected_id:
+            if lock.active:
+                lock.stop()
+            if not self.tracking_enabled or matched_box is None:
+                return None
+        frame = packet.frame
+        if not lock.active:
+            if matched_box is None:
+                return None
+            lock.start(frame, matched_box, packet.index, self.selected_id)
+            box = matched_box
         else:
-            send_home_command(self.ser)
+            box = lock.update(frame)
+            if detected:
+                if matched_box is not None:
+                    lock.reanchor(frame, matched_box)
+                    box = matched_box
+                elif not lock.miss():
+                    return None  # 目标丢失，恢复常规检测
+        if box is not None:
+            # 检测级按锁定框规划搜索窗口
+            self.roi_hint = (packet.index, tuple(box), lock.velocity, 0.0)
+        return box
+
+    def update_roi(self, index, track, found):
+        """检测帧上锁定目标的状态：记录是否找到，并发布下一次搜索窗口的依据"""
+        if self.roi_planner is None:
+            return
+        self.roi_planner.report(found)
+        # 跟踪器状态 [cx, cy, a, h, vx, vy, va, vh]，速度单位为像素/帧
+        std = max(track.covariance[0, 0], track.covariance[1, 1]) ** 0.5
+        self.roi_hint = (index, tuple(track.to_ltrb()), (track.mean[4], track.mean[5]), std)
+
+    def clear_roi(self):
+        self.roi_hint = None
+        if self.roi_planner is not None:
+            self.roi_planner.reset()
+
+    def render_stage(self, packet):
+        frame = packet.frame
+        for track_id, (x1, y1, x2, y2), selected in packet.tracks:
+            color = (0, 0, 255) if selected else (0, 255, 0)
+            label = f"Tracking ID: {track_id}" if selected else f"ID: {track_id}"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-        # 判断是否达到阈值
-        # if abs(delta_x) < self.centered_threshold and abs(delta_y) < self.centered_threshold:
-        #     self.stop_auto_track()
-        #     return
+        info_text = packet.info
+        info_text += f"\n丢弃帧数: {self.grabber.dropped}/{self.grabber.captured}"
+        info_text += "\n" + self.pipeline.summary()
+        info_text += f"\n显示跳帧: {self.presenter.skipped}  检测间隔: {self.scheduler.interval}"
+        if packet.roi is not None:
+            info_text += f"\n检测窗口: {packet.roi[2] - packet.roi[0]}x{packet.roi[3] - packet.roi[1]}"
+        if self.tracking_enabled:
+            stats = self.control.stats()
+            if stats['jitter_ms'] is not None:
+                info_text += (f"\n控制周期: {stats['period_ms']:.1f}ms  "
+                              f"抖动: {stats['jitter_ms']:.2f}ms\n超时周期: {stats['missed']}")
+        self.update_info.emit(info_text)
 
-        alpha_x = 81.0 / W
-        alpha_y = 62.1 / H
-        delta_yaw = -delta_x * alpha_x
-        delta_pitch = -delta_y * alpha_y
+        presented = self.presenter.present(frame)
+        if presented is not None:
+            self.change_pixmap.emit(presented)
 
-        new_yaw = max(min(self.current_yaw + delta_yaw, 135), -135)
-        new_pitch = max(min(self.current_pitch + delta_pitch, 25), -90)
+    def set_view_size(self, width, height):
+        self.presenter.set_view_size(width, height)
+
+    def move_gimbal(self, delta_yaw, delta_pitch):
+        self.control.move(delta_yaw, delta_pitch)
+
+    def start_nudge(self, direction):
+        """按住方向键：由控制线程按 nudge_rate 持续转动"""
+        yaw_rate, pitch_rate = {'up': (0, 1), 'down': (0, -1),
+                                'left': (-1, 0), 'right': (1, 0)}[direction]
+        self.control.nudge(yaw_rate * self.nudge_rate, pitch_rate * self.nudge_rate)
+
+    def stop_nudge(self):
+        self.control.nudge(0, 0)
+
+    def return_home(self):
+        self.control.home()
 
-        if (new_yaw != self.current_yaw) or (new_pitch != self.current_pitch):
-            control_gimbal(self.ser, -new_yaw, -new_pitch)
-            self.current_yaw = new_yaw
-            self.current_pitch = new_pitch
+    def set_zoom(self, zoom):
+        """相机变焦后调用，使目标偏移换算为云台角度时与当前视场一致"""
+        self.control.set_zoom(zoom)
 
     def start_auto_track(self):
         if self.selected_id is None:
             return
         self.tracking_enabled = True
+        self.control.start_tracking()
         self.tracking_status.emit(True)
-        self.auto_track()
-        self.auto_track_timer.start(2000)  # 启动2秒定时器
 
     def stop_auto_track(self):
-        self.auto_track_timer.stop()
+        self.control.stop_tracking()
         self.tracking_enabled = False
         self.target_center = None
         self.selected_id = None
+        self.scheduler.clear_target()
+        self.clear_roi()
         self.tracking_status.emit(False)
         self.target_selected.emit(False)
 
     def stop(self):
         self.running = False
-        self.cap.release()
+        self.pipeline.stop()
+        self.grabber.stop()
+        self.control.close()
+        self.telemetry.stop()
+        self.writer.close()
+        self.transport.close()
         self.ser.close()
@@ -1,90 +1,21 @@
+import os
 import sys
-import struct
 import time
-import serial
 import cv2
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel,
                              QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QSizePolicy, QFrame)
-from ultralytics import YOLO
-from deep_sort_realtime.deepsort_tracker import DeepSort
-
-# ============================== 云台控制模块 ==============================
-crc16_tab = [
-    0x0000, 0x1021, 0x2042, 0x3063, 0x4084, 0x50A5, 0x60C6, 0x70E7,
-    0x8108, 0x9129, 0xA14A, 0xB16B, 0xC18C, 0xD1AD, 0xE1CE, 0xF1EF,
-    0x1231, 0x0210, 0x3273, 0x2252, 0x52B5, 0x4294, 0x72F7, 0x62D6,
-    0x9339, 0x8318, 0xB37B, 0xA35A, 0xD3BD, 0xC39C, 0xF3FF, 0xE3DE,
-    0x2462, 0x3443, 0x0420, 0x1401, 0x64E6, 0x74C7, 0x44A4, 0x5485,
-    0xA56A, 0xB54B, 0x8528, 0x9509, 0xE5EE, 0xF5CF, 0xC5AC, 0xD58D,
-    0x3653, 0x2672, 0x1611, 0x0630, 0x76D7, 0x66F6, 0x5695, 0x46B4,
-    0xB75B, 0xA77A, 0x9719, 0x8738, 0xF7DF, 0xE7FE, 0xD79D, 0xC7BC,
-    0x48C4, 0x58E5, 0x6886, 0x78A7, 0x0840, 0x1861, 0x2802, 0x3823,
-    0xC9CC, 0xD9ED, 0xE98E, 0xF9AF, 0x8948, 0x9969, 0xA90A, 0xB92B,
-    0x5AF5, 0x4AD4, 0x7AB7, 0x6A96, 0x1A71, 0x0A50, 0x3A33, 0x2A12,
-    0xDBFD, 0xCBDC, 0xFBBF, 0xEB9E, 0x9B79, 0x8B58, 0xBB3B, 0xAB1A,
-    0x6CA6, 0x7C87, 0x4CE4, 0x5CC5, 0x2C22, 0x3C03, 0x0C60, 0x1C41,
-    0xEDAE, 0xFD8F, 0xCDEC, 0xDDCD, 0xAD2A, 0xBD0B, 0x8D68, 0x9D49,
-    0x7E97, 0x6EB6, 0x5ED5, 0x4EF4, 0x3E13, 0x2E32, 0x1E51, 0x0E70,
-    0xFF9F, 0xEFBE, 0xDFDD, 0xCFFC, 0xBF1B, 0xAF3A, 0x9F59, 0x8F78,
-    0x9188, 0x81A9, 0xB1CA, 0xA1EB, 0xD10C, 0xC12D, 0xF14E, 0xE16F,
-    0x1080, 0x00A1, 0x30C2, 0x20E3, 0x5004, 0x4025, 0x7046, 0x6067,
-    0x83B9, 0x9398, 0xA3FB, 0xB3DA, 0xC33D, 0xD31C, 0xE37F, 0xF35E,
-    0x02B1, 0x1290, 0x22F3, 0x32D2, 0x4235, 0x5214, 0x6277, 0x7256,
-    0xB5EA, 0xA5CB, 0x95A8, 0x8589, 0xF56E, 0xE54F, 0xD52C, 0xC50D,
-    0x34E2, 0x24C3, 0x14A0, 0x0481, 0x7466, 0x6447, 0x5424, 0x4405,
-    0xA7DB, 0xB7FA, 0x8799, 0x97B8, 0xE75F, 0xF77E, 0xC71D, 0xD73C,
-    0x26D3, 0x36F2, 0x0691, 0x16B0, 0x6657, 0x7676, 0x4615, 0x5634,
-    0xD94C, 0xC96D, 0xF90E, 0xE92F, 0x99C8, 0x89E9, 0xB98A, 0xA9AB,
-    0x5844, 0x4865, 0x7806, 0x6827, 0x18C0, 0x08E1, 0x3882, 0x28A3,
-    0xCB7D, 0xDB5C, 0xEB3F, 0xFB1E, 0x8BF9, 0x9BD8, 0xABBB, 0xBB9A,
-    0x4A75, 0x5A54, 0x6A37, 0x7A16, 0x0AF1, 0x1AD0, 0x2AB3, 0x3A92,
-    0xFD2E, 0xED0F, 0xDD6C, 0xCD4D, 0xBDAA, 0xAD8B, 0x9DE8, 0x8DC9,
-    0x7C26, 0x6C07, 0x5C64, 0x4C45, 0x3CA2, 0x2C83, 0x1CE0, 0x0CC1,
-    0xEF1F, 0xFF3E, 0xCF5D, 0xDF7C, 0xAF9B, 0xBFBA, 0x8FD9, 0x9FF8,
-    0x6E17, 0x7E36, 0x4E55, 0x5E74, 0x2E93, 0x3EB2, 0x0ED1, 0x1EF0
-]
-
-
-def crc16_cal(data):
-    crc = 0
-    for byte in data:
-        temp = (crc >> 8) & 0xFF
-        crc = ((crc << 8) & 0xFFFF) ^ crc16_tab[(byte ^ temp) & 0xFF]
-    return crc
-
-
-def send_gimbal_control(ser, yaw, pitch):
-    cmd = bytearray([
-        0x55, 0x66,
-        0x01,
-        0x04, 0x00,
-        0x00, 0x00,
-        0x0E
-    ])
-    cmd.extend(struct.pack('<h', int(yaw * 10)))
-    cmd.extend(struct.pack('<h', int(pitch * 10)))
-    crc = crc16_cal(cmd)
-    cmd.extend(struct.pack('<H', crc))
-    ser.write(cmd)
-
-
-def control_gimbal(ser, yaw, pitch):
-    if not (-135.0 <= yaw <= 135.0):
-        raise ValueError("Yaw超出范围(-135.0~135.0)！")
-    if not (-90.0 <= pitch <= 25.0):
-        raise ValueError("Pitch超出范围(-90.0~25.0)！")
-    send_gimbal_control(ser, yaw, pitch)
-
-
-def send_home_command(ser):
-    cmd = bytearray([0x55, 0x66, 0x01, 0x01, 0x00, 0x00, 0x00, 0x08, 0x01])
-    crc = crc16_cal(cmd)
-    cmd.extend(struct.pack('<H', crc))
-    ser.write(cmd)
-    print("一键回中指令已发送")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'track'))
+from gimbal_control import control_gimbal, send_home_command
+from gimbal_link import open_link
+from frame_capture import FrameGrabber
+from video_pipeline import VideoPipeline, grabber_source
+from detection_filter import extract_detections
+from inference_backend import load_detector
+from trackers import create_tracker
 
 
 # ============================== 视频处理线程 ==============================
@@ -96,10 +27,15 @@ class VideoThread(QThread):
 
     def __init__(self, model_path, rtsp_url, serial_port):
         super().__init__()
-        self.ser = serial.Serial(serial_port, 115200, timeout=2)
-        self.model = YOLO(model_path).to('cuda')
-        self.tracker = DeepSort(max_age=30)
-        self.cap = cv2.VideoCapture(rtsp_url)
+        self.ser = open_link(serial_port, 115200, timeout=2)
+        self.model = load_detector(model_path)
+        self.tracker = create_tracker('deepsort', max_age=30)
+        self.grabber = FrameGrabber(rtsp_url)
+        self.cap = self.grabber.cap
+        self.pipeline = (VideoPipeline(grabber_source(self.grabber))
+                         .add_stage('detect', self.detect_stage)
+                         .add_stage('track', self.track_stage)
+                         .add_stage('render', self.render_stage))
         self.selected_id = None
         self.running = True
         self.current_yaw = 0
@@ -127,48 +63,51 @@ class VideoThread(QThread):
         control_gimbal(self.ser, self.current_yaw, self.current_pitch)
         time.sleep(2)
 
-        while self.running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-
-            results = self.model(frame, verbose=False)[0]
-            detections = [(box.xyxy[0].cpu().numpy(), box.conf.item(), box.cls.item())
-                          for box in results.boxes]
-
-            self.tracks = self.tracker.update_tracks(
-                [([x1, y1, x2 - x1, y2 - y1], conf, cls_id)
-                 for (x1, y1, x2, y2), conf, cls_id in detections],
-                frame=frame
-            )
-
-            info_text = "当前跟踪目标信息：\n暂无选择"
-            for track in self.tracks:
-                if not track.is_confirmed():
-                    continue
-                track_id = track.track_id
-                ltrb = track.to_ltrb()
-                x1, y1, x2, y2 = map(int, ltrb)
-
-                if self.selected_id is None:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, f"ID: {track_id}", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                if self.selected_id and track_id == self.selected_id:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, f"Tracking ID: {track_id}", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    self.target_center = ((x1 + x2) // 2, (y1 + y2) // 2)
-                    info_text = f"跟踪目标ID: {track_id}\n坐标范围:\nX: {x1}-{x2}\nY: {y1}-{y2}"
-
-            self.update_info.emit(info_text)
-
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.change_pixmap.emit(qt_image)
+        self.grabber.start()
+        self.pipeline.start()
+        while self.running and not self.pipeline.wait(0.5):
+            pass
+
+    def detect_stage(self, packet):
+        results = self.model(packet.frame, verbose=False)[0]
+        packet.detections = extract_detections(results.boxes.data)
+        return packet
+
+    def track_stage(self, packet):
+        self.tracker.select(self.selected_id)
+        self.tracks = self.tracker.update(packet.detections, packet.frame)
+
+        packet.tracks = []
+        packet.info = "当前跟踪目标信息：\n暂无选择"
+        for track in self.tracks:
+            if not track.is_confirmed():
+                continue
+            track_id = track.track_id
+            x1, y1, x2, y2 = map(int, track.to_ltrb())
+
+            if self.selected_id is None:
+                packet.tracks.append((track_id, (x1, y1, x2, y2), False))
+
+            if self.selected_id and track_id == self.selected_id:
+                packet.tracks.append((track_id, (x1, y1, x2, y2), True))
+                self.target_center = ((x1 + x2) // 2, (y1 + y2) // 2)
+                packet.info = f"跟踪目标ID: {track_id}\n坐标范围:\nX: {x1}-{x2}\nY: {y1}-{y2}"
+        return packet
+
+    def render_stage(self, packet):
+        frame = packet.frame
+        for track_id, (x1, y1, x2, y2), selected in packet.tracks:
+            label = f"Tracking ID: {track_id}" if selected else f"ID: {track_id}"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+        self.update_info.emit(packet.info + "\n" + self.pipeline.summary())
+
+        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb_image.shape
+        bytes_per_line = ch * w
+        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        self.change_pixmap.emit(qt_image)
 
     def move_gimbal(self, delta_yaw, delta_pitch):
         self.current_yaw = max(min(self.current_yaw + delta_yaw, 135), -135)
@@ -226,7 +165,8 @@ class VideoThread(QThread):
 
     def stop(self):
         self.running = False
-        self.cap.release()
+        self.pipeline.stop()
+        self.grabber.stop()
         self.ser.close()
 
 
@@ -471,7 +411,8 @@ class MainWindow(QMainWindow):
 # ============================== 主程序 ==============================
 if __name__ == "__main__":
     RTSP_URL = "rtsp://192.168.144.25:8554/main.264"
-    SERIAL_PORT = "COM15"
+    # 串口名，或 udp://192.168.144.25:37260 走网口控制
+    SERIAL_PORT = sys.argv[1] if len(sys.argv) > 1 else "COM15"
     MODEL_PATH = "yolov8n-face.pt"
 
     app = QApplication(sys.argv)